@@ -0,0 +1,174 @@
+"""
+Fixed corpora of cells for the render benchmarks.
+
+Every case is a Case of the cell source, the override command that it is
+rendered with and the namespace that results from running it. The sources
+are generated deterministically so that runs on different machines and
+commits render exactly the same cells.
+"""
+
+from dataclasses import dataclass
+import math
+
+import numpy as np
+
+from generator import generate
+
+SIZES = {"small": 5, "medium": 40, "huge": 400}
+
+
+@dataclass
+class Case:
+    name: str
+    renderer: str  # "latex" or "latex_report"
+    override: str
+    source: str
+    results: dict
+
+
+def run_source(source: str, namespace: dict = None) -> dict:
+    """
+    Returns the namespace after running 'source', as a notebook would before
+    rendering the cell.
+    """
+    results = {
+        "sqrt": math.sqrt,
+        "sin": math.sin,
+        "cos": math.cos,
+        "pi": math.pi,
+        "np": np,
+    }
+    results.update(namespace or {})
+    exec(source, results)
+    results.pop("__builtins__", None)
+    return results
+
+
+def calc_lines(n_lines: int) -> list:
+    """
+    Returns 'n_lines' of dependent calculations that mix the operators,
+    functions, subscripts and greek letters that handcalcs swaps.
+    """
+    lines = ["a_1 = 2.5", "b_1 = 4.25", "alpha = 0.35"]
+    for idx in range(n_lines):
+        prev = f"x_{idx - 1}" if idx else "a_1"
+        template = idx % 5
+        if template == 0:
+            line = f"x_{idx} = {prev} * b_1 + a_1**2 / (b_1 - alpha)"
+        elif template == 1:
+            line = f"x_{idx} = sqrt({prev}**2 + b_1**2) * cos(alpha) # step {idx}"
+        elif template == 2:
+            line = f"x_{idx} = ({prev} + a_1) / (2 * b_1) - sin(alpha)**2"
+        elif template == 3:
+            line = f"x_{idx} = {prev} * pi / 4 + (a_1 * b_1) / ({prev} + 1)"
+        else:
+            line = f"x_{idx} = abs({prev} - b_1) / 3 + alpha * {prev}"
+        lines.append(line)
+    return lines
+
+
+def calc_source(n_lines: int, header: str = "") -> str:
+    lines = calc_lines(n_lines)
+    if header:
+        lines.insert(0, header)
+    return "\n".join(lines) + "\n"
+
+
+def parameter_source(n_lines: int) -> str:
+    lines = ["# Parameters"]
+    for idx in range(n_lines):
+        lines.append(f"p_{idx} = {idx * 1.5 + 0.25} # parameter {idx}")
+    return "\n".join(lines) + "\n"
+
+
+def nested_fraction_source(depth: int) -> str:
+    expr = "a_1"
+    for idx in range(depth):
+        expr = f"(b_1 + {expr}) / (a_1 + {idx + 1} / (b_1 + {expr}))"
+    return f"a_1 = 2.5\nb_1 = 4.25\nf = {expr}\n"
+
+
+def conditional_source(n_blocks: int) -> str:
+    lines = ["a_1 = 2.5", "b_1 = 4.25"]
+    for idx in range(n_blocks):
+        lines.append(f"if a_1 < {idx % 4}: c_{idx} = a_1 * b_1 + {idx}")
+        lines.append(f"elif b_1 > {idx % 7}: c_{idx} = (a_1 + b_1) / {idx + 1}")
+        lines.append(f"else: c_{idx} = sqrt(a_1) * {idx}")
+    return "\n".join(lines) + "\n"
+
+
+def array_source(n_lines: int, n_items: int) -> str:
+    lines = [f"a_1 = np.linspace(1.0, 2.0, {n_items})", "b_1 = 4.25"]
+    for idx in range(n_lines):
+        prev = f"x_{idx - 1}" if idx else "a_1"
+        lines.append(f"x_{idx} = {prev} * b_1 / (b_1 + 1)")
+    return "\n".join(lines) + "\n"
+
+
+def report_source(n_sections: int) -> str:
+    lines = []
+    calcs = calc_lines(n_sections * 4)
+    lines.extend(calcs[:3])
+    for idx in range(n_sections):
+        lines.append(f"## {idx + 1}. Section {idx + 1}")
+        lines.append(f"## Some explanation of the calculation of x_{idx * 4}")
+        lines.extend(calcs[3 + idx * 4 : 3 + (idx + 1) * 4])
+    return "\n".join(lines) + "\n"
+
+
+def input_source(n_lines: int) -> str:
+    lines = []
+    for idx in range(n_lines):
+        lines.append(f"## Input value number {idx}")
+        lines.append(f"p_{idx} = {idx * 1.5 + 0.25} # parameter {idx}")
+    return "\n".join(lines) + "\n"
+
+
+def build_cases() -> list:
+    """
+    Returns the list of all benchmark cases.
+    """
+    cases = []
+
+    def add(name, renderer, override, source):
+        cases.append(Case(name, renderer, override, source, run_source(source)))
+
+    for size, n_lines in SIZES.items():
+        add(f"calc-{size}", "latex", "", calc_source(n_lines))
+        add(f"short-{size}", "latex", "short", calc_source(n_lines))
+        add(f"long-{size}", "latex", "long", calc_source(n_lines))
+        add(f"params-{size}", "latex", "params", parameter_source(n_lines))
+        add(f"symbolic-{size}", "latex", "symbolic", calc_source(n_lines))
+        add(f"report-{size}", "latex_report", "report", report_source(n_lines // 4 + 1))
+        add(f"input-{size}", "latex_report", "input", input_source(n_lines))
+
+    for depth in (2, 4, 6):
+        add(f"nested-fractions-{depth}", "latex", "", nested_fraction_source(depth))
+    for n_blocks in (10, 100):
+        add(f"conditionals-{n_blocks}", "latex", "", conditional_source(n_blocks))
+    for n_items in (10, 1000):
+        add(f"arrays-{n_items}", "latex", "", array_source(10, n_items))
+
+    def add_generated(name, renderer, override, **kwargs):
+        corpus = generate(seed=0, **kwargs)
+        cases.append(Case(name, renderer, override, corpus.source, corpus.results))
+
+    add_generated("generated-deep-50", "latex", "", lines=20, depth=50)
+    add_generated(
+        "generated-conditionals", "latex", "", lines=200, conditional_share=0.5
+    )
+    add_generated(
+        "generated-greek",
+        "latex",
+        "",
+        lines=200,
+        greek_density=1.0,
+        subscript_density=1.0,
+    )
+    add_generated("generated-complex", "latex", "", lines=200, value_type="complex")
+    add_generated("generated-arrays", "latex", "", lines=200, value_type="array")
+    add_generated("generated-sympy", "latex", "", lines=200, value_type="sympy")
+    add_generated(
+        "generated-report-2000", "latex_report", "report", lines=2000, report=True
+    )
+    return cases
@@ -0,0 +1,270 @@
+"""
+Generator of synthetic calculation cells for scale testing.
+
+generate() returns a Corpus of valid handcalcs source together with the
+namespace that results from running it, so that it can be passed straight
+to latex() or latex_report(). The output only depends on the arguments, so
+the same seed always gives the same cell.
+
+    corpus = generate(lines=10_000, depth=50, report=True, seed=1)
+    latex_report(corpus.source, corpus.results, "report", config_options)
+
+For memory profiling, render the corpus between tracemalloc.start() and
+tracemalloc.take_snapshot(). Run as a script to print a generated source:
+
+    python benchmarks/generator.py --lines 1000 --depth 10 --seed 3
+"""
+
+import argparse
+from dataclasses import dataclass
+import math
+import pathlib
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "src"))
+
+from handcalcs.constants import GREEK_LOWER  # noqa: E402
+
+VALUE_TYPES = ("float", "complex", "array", "sympy")
+LATIN = "abcdefghkmnpqrstuvwxyzABCDEFGHKLMNPQRSTUVWXYZ"
+GREEK = [name for name in GREEK_LOWER if name != "pi"]  # math.pi is in the namespace
+
+
+@dataclass
+class Corpus:
+    source: str
+    results: dict
+    lines: int
+    seed: int
+
+
+class _SourceWriter:
+    """
+    Writes the lines of a generated cell, keeping track of the names that
+    are defined so far.
+    """
+
+    def __init__(
+        self,
+        rng: random.Random,
+        depth: int,
+        conditional_share: float,
+        greek_density: float,
+        subscript_density: float,
+        value_type: str,
+        report: bool,
+    ):
+        self.rng = rng
+        self.depth = depth
+        self.conditional_share = conditional_share
+        self.greek_density = greek_density
+        self.subscript_density = subscript_density
+        self.value_type = value_type
+        self.report = report
+        self.array_size = rng.randrange(2, 12)
+        self.unused_greek = list(GREEK)
+        self.rng.shuffle(self.unused_greek)
+        self.names = []
+        self.scalars = []
+        self.count = 0
+        self.lines = []
+
+    def new_name(self) -> str:
+        self.count += 1
+        greek = self.rng.random() < self.greek_density
+        subscript = self.rng.random() < self.subscript_density
+        if greek and not subscript and self.unused_greek:
+            return self.unused_greek.pop()
+        base = self.rng.choice(GREEK) if greek else self.rng.choice(LATIN)
+        if subscript:
+            tag = self.rng.choice(LATIN + "0123456789")
+            return f"{base}_{tag}{self.count}"
+        return f"{base}{self.count}"
+
+    def leaf(self, scalar: bool = False) -> str:
+        choice = self.rng.random()
+        if choice < 0.6 and self.names and not scalar:
+            return self.rng.choice(self.names)
+        elif choice < 0.8 and self.scalars:
+            return self.rng.choice(self.scalars)
+        return f"{self.rng.uniform(0.5, 9.5):.2f}"
+
+    def expression(self, depth: int, scalar: bool = False) -> str:
+        """
+        Returns an expression with sub-expressions nested 'depth' levels
+        deep. Divisors are kept away from zero with abs(...) + 1. With
+        'scalar', only the scalar names are used.
+        """
+        if depth <= 0:
+            leaf = self.leaf(scalar)
+            if self.rng.random() < 0.15:
+                return f"{leaf}**2"
+            return leaf
+        inner = self.expression(depth - 1, scalar)
+        other = self.leaf(scalar)
+        form = self.rng.randrange(6)
+        if form == 0:
+            return f"{other} + ({inner})"
+        elif form == 1:
+            return f"({inner}) - {other}"
+        elif form == 2:
+            return f"{other} * ({inner})"
+        elif form == 3:
+            return f"({inner}) / (abs({other}) + 1)"
+        elif form == 4:
+            return f"{other} / (abs({inner}) + 1)"
+        elif self.value_type == "float":
+            return f"sqrt(abs({inner}) + 1)"
+        return f"abs({inner})"
+
+    def value(self) -> str:
+        number = f"{self.rng.uniform(0.5, 9.5):.3f}"
+        if self.value_type == "complex":
+            return f"{number} + {self.rng.uniform(0.5, 9.5):.3f}j"
+        elif self.value_type == "array":
+            return f"np.linspace({number}, {float(number) * 2:.3f}, {self.array_size})"
+        elif self.value_type == "sympy":
+            return f"{number} * {self.rng.choice(['s', 't'])}"
+        return number
+
+    def comment(self) -> str:
+        if self.rng.random() < 0.2:
+            return f" # {self.rng.choice(['load', 'span', 'check', 'factor'])}"
+        return ""
+
+    def write_heading(self):
+        if self.report and self.rng.random() < 0.1:
+            self.lines.append(f"## {len(self.lines)}. Section about {self.leaf()}")
+
+    def write_scalar(self):
+        name = self.new_name()
+        self.lines.append(f"{name} = {self.rng.uniform(0.5, 9.5):.3f}{self.comment()}")
+        self.scalars.append(name)
+
+    def write_value(self):
+        name = self.new_name()
+        self.lines.append(f"{name} = {self.value()}{self.comment()}")
+        self.names.append(name)
+
+    def write_calculation(self):
+        depth = self.rng.randint(min(1, self.depth), self.depth)
+        expression = self.expression(depth)
+        name = self.new_name()
+        self.lines.append(f"{name} = {expression}{self.comment()}")
+        self.names.append(name)
+
+    def write_conditional(self):
+        """
+        Writes an if/(elif)/else block. Its conditions and expressions only
+        use scalars since conditional lines cannot render array results.
+        """
+        name = self.new_name()
+        left, right = self.rng.sample(self.scalars, 2)
+        op = self.rng.choice(["<", "<=", ">", ">="])
+        self.lines.append(
+            f"if {left} {op} {right}: {name} = {self.expression(1, scalar=True)}"
+        )
+        if self.rng.random() < 0.5:
+            self.lines.append(
+                f"elif {left} == {right}: {name} = {self.expression(1, scalar=True)}"
+            )
+        self.lines.append(f"else: {name} = {self.expression(1, scalar=True)}")
+        self.scalars.append(name)
+
+
+def generate(
+    lines: int = 100,
+    depth: int = 3,
+    conditional_share: float = 0.1,
+    greek_density: float = 0.3,
+    subscript_density: float = 0.5,
+    value_type: str = "float",
+    report: bool = False,
+    seed: int = 0,
+) -> Corpus:
+    """
+    Returns a Corpus of about 'lines' lines of calculations, whose
+    expressions are nested up to 'depth' levels deep.
+
+    'conditional_share' is the share of the lines that are part of
+    if/elif/else blocks. 'greek_density' and 'subscript_density' are the
+    shares of names that are Greek letters and that have a subscript.
+    'value_type' is the type of the values that calculations start from:
+    one of "float", "complex", "array" (numpy) or "sympy" (in terms of the
+    symbols s and t, which are added to the namespace). With 'report',
+    "##" headings are interspersed for rendering with latex_report().
+    """
+    if value_type not in VALUE_TYPES:
+        raise ValueError(
+            f"value_type must be one of {VALUE_TYPES}, not {value_type!r}."
+        )
+    rng = random.Random(seed)
+    writer = _SourceWriter(
+        rng,
+        depth,
+        conditional_share,
+        greek_density,
+        subscript_density,
+        value_type,
+        report,
+    )
+    for _ in range(3):
+        writer.write_scalar()
+    writer.write_value()
+    while len(writer.lines) < lines:
+        writer.write_heading()
+        choice = rng.random()
+        if choice < conditional_share:
+            writer.write_conditional()
+        elif choice < conditional_share + 0.15:
+            writer.write_value()
+        else:
+            writer.write_calculation()
+    source = "\n".join(writer.lines) + "\n"
+    return Corpus(source, run_source(source, value_type), len(writer.lines), seed)
+
+
+def run_source(source: str, value_type: str = "float") -> dict:
+    """
+    Returns the namespace after running 'source', as a notebook would before
+    rendering the cell.
+    """
+    namespace = {"sqrt": math.sqrt, "pi": math.pi, "np": np}
+    if value_type == "sympy":
+        import sympy
+
+        namespace["s"], namespace["t"] = sympy.symbols("s t")
+    exec(source, namespace)
+    namespace.pop("__builtins__", None)
+    return namespace
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prints a generated cell source.")
+    parser.add_argument("--lines", type=int, default=100)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--conditional-share", type=float, default=0.1)
+    parser.add_argument("--greek-density", type=float, default=0.3)
+    parser.add_argument("--subscript-density", type=float, default=0.5)
+    parser.add_argument("--value-type", choices=VALUE_TYPES, default="float")
+    parser.add_argument("--report", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    corpus = generate(
+        args.lines,
+        args.depth,
+        args.conditional_share,
+        args.greek_density,
+        args.subscript_density,
+        args.value_type,
+        args.report,
+        args.seed,
+    )
+    print(corpus.source, end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Runs the render benchmarks and saves the timings as JSON.
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --compare baseline.json --tolerance 0.1
+
+Each case is timed "cold", with the render caches cleared before every
+render, and "warm", with the caches left filled by the previous render.
+With --memory, the peak memory of a cold render is recorded as well.
+With --compare, the run exits with status 1 if the cold median time of any
+case is slower than in the given results file by more than --tolerance.
+"""
+
+import argparse
+import json
+import pathlib
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+_here = pathlib.Path(__file__).parent
+sys.path.insert(0, str(_here.parent / "src"))
+sys.path.insert(0, str(_here))
+
+from handcalcs import global_config, clear_caches  # noqa: E402
+from handcalcs.handcalcs import latex  # noqa: E402
+from report.formatters import latex_report  # noqa: E402
+
+from corpora import build_cases  # noqa: E402
+
+RENDERERS = {"latex": latex, "latex_report": latex_report}
+
+
+def time_case(case, repeat: int, min_time: float, cold: bool) -> dict:
+    """
+    Returns a dict of the timings, in seconds per render, of 'repeat' rounds
+    of rendering 'case'. Each round renders the case as many times as it
+    takes to run for at least 'min_time' seconds.
+    """
+    renderer = RENDERERS[case.renderer]
+    config_options = dict(global_config._config)
+
+    def render():
+        if cold:
+            clear_caches()
+        renderer(case.source, case.results, case.override, config_options)
+
+    render()  # Fills the caches for the warm timings
+    start = time.perf_counter()
+    render()
+    once = time.perf_counter() - start
+    number = max(1, int(min_time / max(once, 1e-9)))
+
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            render()
+        rounds.append((time.perf_counter() - start) / number)
+    return {
+        "min": min(rounds),
+        "median": statistics.median(rounds),
+        "max": max(rounds),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def peak_memory(case) -> int:
+    """
+    Returns the peak memory, in bytes, allocated during one cold render of
+    'case'.
+    """
+    renderer = RENDERERS[case.renderer]
+    config_options = dict(global_config._config)
+    clear_caches()
+    tracemalloc.start()
+    try:
+        renderer(case.source, case.results, case.override, config_options)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(cases, repeat: int, min_time: float, memory: bool = False) -> dict:
+    results = {}
+    for case in cases:
+        results[case.name] = {
+            "renderer": case.renderer,
+            "override": case.override,
+            "lines": case.source.count("\n"),
+            "cold": time_case(case, repeat, min_time, cold=True),
+            "warm": time_case(case, repeat, min_time, cold=False),
+        }
+        if memory:
+            results[case.name]["peak_memory"] = peak_memory(case)
+        print(
+            f"{case.name:<24} cold {results[case.name]['cold']['median'] * 1e3:9.3f} ms"
+            f"   warm {results[case.name]['warm']['median'] * 1e3:9.3f} ms"
+        )
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Returns a list of messages for the cases whose cold median time is
+    slower than in 'baseline' by more than 'tolerance' (a fraction).
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        new = result["cold"]["median"]
+        old = baseline[name]["cold"]["median"]
+        if new > old * (1 + tolerance):
+            regressions.append(
+                f"{name}: {old * 1e3:.3f} ms -> {new * 1e3:.3f} ms"
+                f" ({(new / old - 1) * 100:+.1f}%)"
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--output", help="Path of the JSON file to save results to")
+    parser.add_argument("--compare", help="Path of a JSON results file to compare to")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument(
+        "-k", dest="keyword", default="", help="Only run matching cases"
+    )
+    parser.add_argument(
+        "--memory", action="store_true", help="Also record the peak memory of each case"
+    )
+    args = parser.parse_args(argv)
+
+    cases = [case for case in build_cases() if args.keyword in case.name]
+    results = run(cases, args.repeat, args.min_time, args.memory)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": dict(global_config._config),
+        "benchmarks": results,
+    }
+    if args.output:
+        with open(args.output, "w") as results_file:
+            json.dump(report, results_file, indent=4)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)["benchmarks"]
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""
+The render benchmarks as a pytest-benchmark suite.
+
+    pytest benchmarks --benchmark-json results.json
+    pytest benchmarks --benchmark-autosave
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=median:10%
+
+Every case of corpora.build_cases() is timed "warm", with the render caches
+left filled by the previous render, and "cold", with the caches cleared
+before every render. benchmarks/run.py runs the same cases without
+pytest and can also record their peak memory.
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from handcalcs import clear_caches, global_config  # noqa: E402
+
+from corpora import build_cases  # noqa: E402
+from run import RENDERERS  # noqa: E402
+
+CASES = build_cases()
+COLD_ROUNDS = 5
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case.name for case in CASES])
+@pytest.mark.parametrize("caches", ["warm", "cold"])
+def test_render(benchmark, case, caches):
+    renderer = RENDERERS[case.renderer]
+    config_options = dict(global_config._config)
+    benchmark.group = case.name
+    args = (case.source, case.results, case.override, config_options)
+    if caches == "cold":
+        benchmark.pedantic(
+            renderer, args=args, setup=clear_caches, rounds=COLD_ROUNDS, iterations=1
+        )
+    else:
+        benchmark(renderer, *args)
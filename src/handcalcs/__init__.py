@@ -16,6 +16,8 @@ Render arithmetic calucations in Jupyter as though they were written by hand.
 """
 __version__ = "1.10.0"  #
 from .decorator import handcalc
-from .global_config import set_option, save_config
+from .history import HistoryPolicy
+from .sweeps import sweep, SweepResult
+from .global_config import set_option, save_config, cache_info, clear_caches
 
 __all__ = ["handcalc"]
@@ -0,0 +1,243 @@
+"""
+An alternative backend for handcalcs.handcalcs.expr_parser() built on the
+standard library's ast module.
+
+parse_line() produces exactly the parse tree that the pyparsing grammar in
+build_expr_grammar() produces, as nested tuples of str tokens. Python's own
+parser does the tokenizing; this module only re-shapes the resulting syntax
+tree to match the pyparsing grammar's conventions:
+
+    * all binary operators other than "**" (including "=", "," and the
+      comparisons) share one left-associative precedence level, so chains of
+      them are flat;
+    * "**" is right-associative and, like the unary operators and function
+      calls, forms its own group;
+    * a parenthesized chain forms a group; parentheses around a single
+      operand are dropped;
+    * compact complex literals (e.g. "2+3j") are a single token.
+
+Anything that the pyparsing grammar would treat differently (keywords,
+subscripts, strings, non-ASCII names, etc.) raises UnsupportedExpression so
+that the caller can fall back to pyparsing.
+"""
+
+import ast
+import re
+
+
+class UnsupportedExpression(Exception):
+    pass
+
+
+_NUMBER = r"\d+\.?\d*(?:[eE][+-]?\d+)?"  # pyparsing_common.fnumber, unsigned
+_NUMBER_RE = re.compile(_NUMBER)
+_IMAG_RE = re.compile(_NUMBER + "j")
+_COMPLEX_RE = re.compile(r"(?<![\w.])" + _NUMBER + r"[+-][+-]?" + _NUMBER + "j")
+_WORD_RE = re.compile(r"[A-Za-z0-9_.]+")  # pp.Word(pp.alphanums + "_.")
+
+_ARITH_OPS = {
+    ast.Add: "+",
+    ast.Sub: "-",
+    ast.Mult: "*",
+    ast.Div: "/",
+    ast.FloorDiv: "//",
+    ast.Mod: "%",
+}
+
+_COMPARE_OPS = {
+    ast.Eq: "==",
+    ast.NotEq: "!=",
+    ast.Lt: "<",
+    ast.LtE: "<=",
+    ast.Gt: ">",
+    ast.GtE: ">=",
+}
+
+_UNARY_OPS = {
+    ast.USub: "-",
+    ast.UAdd: "+",
+    ast.Invert: "~",
+}
+
+
+def parse_line(line: str) -> tuple:
+    """
+    Returns 'line' parsed into a tuple of str tokens, with sub-tuples for
+    grouped sub-expressions and function calls, matching the tree built by
+    the pyparsing grammar.
+
+    Raises UnsupportedExpression if 'line' cannot be guaranteed to parse the
+    same way it would with the pyparsing grammar.
+    """
+    if not line.isascii() or "#" in line or "\n" in line or "\\" in line:
+        raise UnsupportedExpression(line)
+    source = line.strip()
+    try:
+        module = ast.parse(source)
+        if len(module.body) != 1:
+            raise UnsupportedExpression(line)
+        converter = _Converter(source)
+        parse_tree = converter.convert_statement(module.body[0])
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        raise UnsupportedExpression(line)
+
+    # Every non-whitespace, non-parenthesis character of the line must have
+    # ended up in a token, otherwise pyparsing would have stopped early
+    # (e.g. at a trailing comma) or split a token differently.
+    if "".join(_flatten(parse_tree)) != re.sub(r"[\s()]", "", source):
+        raise UnsupportedExpression(line)
+    if len(_COMPLEX_RE.findall(source)) != converter.complex_literals:
+        raise UnsupportedExpression(line)
+    return parse_tree
+
+
+def _flatten(parse_tree: tuple):
+    for item in parse_tree:
+        if isinstance(item, tuple):
+            yield from _flatten(item)
+        else:
+            yield item
+
+
+class _Converter:
+    """
+    Re-shapes the ast of a single line of 'source' into a pyparsing-style
+    parse tree.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.complex_literals = 0
+
+    def text(self, node: ast.AST) -> str:
+        return self.source[node.col_offset : node.end_col_offset]
+
+    def convert_statement(self, node: ast.stmt) -> tuple:
+        """
+        Returns the top-level parse tree for 'node'. A top-level group is
+        unwrapped, as with more_itertools.collapse(..., levels=1) on the
+        pyparsing result.
+        """
+        if isinstance(node, ast.Assign):
+            items = []
+            for target in node.targets:
+                items.append(self.name(target))
+                items.append("=")
+            items.extend(self.chain_item(node.value))
+            return tuple(items)
+        elif isinstance(node, ast.Expr):
+            operand = self.operand(node.value)
+            if isinstance(operand, tuple):
+                return operand
+            return (operand,)
+        raise UnsupportedExpression(self.source)
+
+    def is_chain(self, node: ast.expr) -> bool:
+        if isinstance(node, ast.BinOp):
+            return type(node.op) in _ARITH_OPS and not self.is_complex(node)
+        return isinstance(node, ast.Compare)
+
+    def is_complex(self, node: ast.BinOp) -> bool:
+        return type(node.op) in (ast.Add, ast.Sub) and bool(
+            _COMPLEX_RE.fullmatch(self.text(node))
+        )
+
+    def is_parenthesized(self, node: ast.expr) -> bool:
+        """
+        Returns True if 'node' is wrapped in parentheses in the source. Only
+        called for chains, whose first and last tokens are never parentheses
+        of their own.
+        """
+        before = self.source[: node.col_offset].rstrip()
+        after = self.source[node.end_col_offset :].lstrip()
+        return before.endswith("(") and after.startswith(")")
+
+    def chain_item(self, node: ast.expr) -> list:
+        """
+        Returns the items that 'node' contributes to the flat chain that it
+        is a part of.
+        """
+        if self.is_chain(node) and not self.is_parenthesized(node):
+            return self.chain(node)
+        return [self.operand(node)]
+
+    def chain(self, node: ast.expr) -> list:
+        if isinstance(node, ast.BinOp):
+            return (
+                self.chain_item(node.left)
+                + [_ARITH_OPS[type(node.op)]]
+                + self.chain_item(node.right)
+            )
+        items = self.chain_item(node.left)
+        for op, comparator in zip(node.ops, node.comparators):
+            if type(op) not in _COMPARE_OPS:
+                raise UnsupportedExpression(self.source)
+            items.append(_COMPARE_OPS[type(op)])
+            items.extend(self.chain_item(comparator))
+        return items
+
+    def operand(self, node: ast.expr):
+        """
+        Returns 'node' as a single item of a parse tree: a str token or a
+        tuple group.
+        """
+        if self.is_chain(node):
+            return tuple(self.chain(node))
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+            return (self.operand(node.left), "**", self.operand(node.right))
+        elif isinstance(node, ast.BinOp) and self.is_complex(node):
+            self.complex_literals += 1
+            return self.text(node)
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+            return (_UNARY_OPS[type(node.op)], self.operand(node.operand))
+        elif isinstance(node, ast.Call):
+            return self.call(node)
+        elif isinstance(node, ast.Constant):
+            return self.constant(node)
+        return self.name(node)
+
+    def call(self, node: ast.Call) -> tuple:
+        if node.keywords or node.col_offset != node.func.col_offset:
+            raise UnsupportedExpression(self.source)
+        if not node.args:
+            return (self.name(node.func),)
+        if any(isinstance(arg, ast.Starred) for arg in node.args):
+            raise UnsupportedExpression(self.source)
+        if len(node.args) == 1:
+            return (self.name(node.func), self.operand(node.args[0]))
+        items = self.chain_item(node.args[0])
+        for arg in node.args[1:]:
+            items.append(",")
+            items.extend(self.chain_item(arg))
+        return (self.name(node.func), tuple(items))
+
+    def constant(self, node: ast.Constant) -> str:
+        text = self.text(node)
+        if isinstance(node.value, complex):
+            valid = _IMAG_RE.fullmatch(text) or (
+                text.startswith(".") and _WORD_RE.fullmatch(text)
+            )
+        elif isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            valid = _NUMBER_RE.fullmatch(text) or (
+                text.startswith(".") and _WORD_RE.fullmatch(text)
+            )
+        else:
+            valid = node.value in (True, False, None) and _WORD_RE.fullmatch(text)
+        if not valid:
+            raise UnsupportedExpression(self.source)
+        return text
+
+    def name(self, node: ast.expr) -> str:
+        """
+        Returns the text of a name or dotted attribute access.
+        """
+        if not isinstance(node, (ast.Name, ast.Attribute)):
+            raise UnsupportedExpression(self.source)
+        text = self.text(node)
+        if not _WORD_RE.fullmatch(text):
+            raise UnsupportedExpression(self.source)
+        if isinstance(node, ast.Attribute) and not isinstance(
+            node.value, (ast.Name, ast.Attribute)
+        ):
+            raise UnsupportedExpression(self.source)
+        return text
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+import threading
+from typing import Any, Hashable
+
+from handcalcs import global_config
+
+
+class LRUCache:
+    """
+    A bounded, thread-safe, least-recently-used cache.
+
+    The maximum number of entries is read from the global config option,
+    'size_option', each time an entry is stored so that it can be changed
+    at any time with handcalcs.set_option(). A size of 0 disables the cache.
+
+    Every cache registers itself by 'name' so that its statistics are
+    available from global_config.cache_info().
+    """
+
+    def __init__(self, name: str, size_option: str):
+        self.name = name
+        self.size_option = size_option
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        global_config._caches[name] = self
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.name!r}, size: {len(self._data)}/{self.maxsize})"
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def maxsize(self) -> int:
+        return global_config._config.get(self.size_option, 0)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the value stored under 'key', or 'default' if there is none.
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Returns None. Stores 'value' under 'key', evicting the least recently
+        used entries if the cache is full.
+        """
+        maxsize = self.maxsize
+        with self._lock:
+            if maxsize <= 0:
+                self._data.clear()
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Returns None. Removes all entries and resets the hit/miss counters.
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> dict:
+        """
+        Returns a dict of the cache's hit/miss counters and current size.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
@@ -1,10 +1,17 @@
 __all__ = ["handcalc"]
 
-from typing import Optional, Callable
+from collections.abc import Mapping
+from typing import Any, Optional, Callable
 from functools import wraps, update_wrapper
+import copy
 import inspect
+import threading
+import types
+import weakref
 import innerscope
-from .handcalcs import LatexRenderer
+from . import global_config
+from . import template
+from .history import CallHistory, HistoryPolicy, estimate_size, format_bytes
 
 
 def handcalc(
@@ -15,7 +22,24 @@ def handcalc(
     scientific_notation: Optional[bool] = None,
     jupyter_display: bool = False,
     record: bool = False,
+    lazy: bool = False,
+    history: Optional[HistoryPolicy] = None,
 ):
+    """
+    Returns a decorator that renders the body of the decorated function as
+    handcalcs latex each time it is called. A call returns a tuple of the
+    latex (between 'left' and 'right') and the return value, or only the
+    return value with 'jupyter_display', which displays the latex instead.
+
+    With 'record', the calls are also recorded in the .history of the
+    returned HandcalcsCallRecorder, bounded by the HistoryPolicy 'history'.
+
+    With 'lazy' (and 'record'), a call returns only the return value, not
+    the tuple, and its latex is rendered from a copy of the values the body
+    referred to when history[i]["latex"] is first read. Errors in rendering
+    are therefore raised on that read, not by the call.
+    """
+
     def handcalc_decorator(func):
         if record:
             decorated = HandcalcsCallRecorder(
@@ -26,6 +50,8 @@ def handcalc(
                 right,
                 scientific_notation,
                 jupyter_display,
+                lazy,
+                history,
             )
         else:
 
@@ -36,12 +62,10 @@ def handcalc(
                     "precision": precision,
                     "sci_not": scientific_notation,
                 }
-                func_source = inspect.getsource(func)
-                cell_source = _func_source_to_cell(func_source)
+                cell_source = get_cell_source(func)
                 # innerscope retrieves values of locals, closures, and globals
                 scope = innerscope.call(func, *args, **kwargs)
-                renderer = LatexRenderer(cell_source, scope, line_args)
-                latex_code = renderer.render()
+                latex_code = template.render(cell_source, scope, line_args)
                 raw_latex_code = "".join(
                     latex_code.replace("\\[", "", 1).rsplit("\\]", 1)
                 )
@@ -56,6 +80,12 @@ def handcalc(
                     return scope.return_value
                 return (left + raw_latex_code + right, scope.return_value)
 
+        # Read by sweep() to render the calculation as the decorator would
+        decorated.line_args = {
+            "override": override,
+            "precision": precision,
+            "sci_not": scientific_notation,
+        }
         return decorated
 
     return handcalc_decorator
@@ -64,6 +94,14 @@ def handcalc(
 class HandcalcsCallRecorder:
     """
     Records function calls for the func stored in .callable
+
+    With '_lazy', a call only records its return value and the values that
+    the function body refers to, and returns just the return value. The
+    latex of a recorded call is rendered when history[i]["latex"] is first
+    read (see RecordedCall).
+
+    '_history_policy' (a HistoryPolicy) bounds which calls are kept in
+    .history; by default all of them are.
     """
 
     def __init__(
@@ -75,23 +113,30 @@ class HandcalcsCallRecorder:
         _right: str = "",
         _scientific_notation: Optional[bool] = None,
         _jupyter_display: bool = False,
+        _lazy: bool = False,
+        _history_policy: Optional[HistoryPolicy] = None,
     ):
         self.callable = func
-        self.history = list()
+        self.history = CallHistory(_history_policy)
         self._override = _override
         self._precision = _precision
         self._left = _left
         self._right = _right
         self._scientific_notation = _scientific_notation
         self._jupyter_display = _jupyter_display
+        self._lazy = _lazy
+        self._config_snapshot = {}
         update_wrapper(self, func)
 
     def __repr__(self):
-        return f"{self.__class__.__name__}({self.callable.__name__}, num_of_calls: {len(self.history)})"
+        return (
+            f"{self.__class__.__name__}({self.callable.__name__}, num_of_calls: {self.calls},"
+            f" history: {len(self.history)} entries, ~{format_bytes(self.history.nbytes)})"
+        )
 
     @property
     def calls(self):
-        return len(self.history)
+        return self.history.calls
 
     def __call__(self, *args, **kwargs):
         line_args = {
@@ -99,12 +144,29 @@ class HandcalcsCallRecorder:
             "precision": self._precision,
             "sci_not": self._scientific_notation,
         }
-        func_source = inspect.getsource(self.callable)
-        cell_source = _func_source_to_cell(func_source)
+        cell_source = get_cell_source(self.callable)
         # innerscope retrieves values of locals, closures, and globals
         scope = innerscope.call(self.callable, *args, **kwargs)
-        renderer = LatexRenderer(cell_source, scope, line_args)
-        latex_code = renderer.render()
+        if self._lazy and not self._jupyter_display:
+            if self._config_snapshot != global_config._config:
+                # Shared by the recorded calls until the config changes
+                self._config_snapshot = dict(global_config._config)
+            values = {
+                name: snapshot_value(value)
+                for name, value in template.get_cell_values(cell_source, scope).items()
+            }
+            self.history.append(
+                RecordedCall(
+                    scope.return_value,
+                    cell_source,
+                    values,
+                    line_args,
+                    self._config_snapshot,
+                ),
+                size=estimate_size((scope.return_value, values)),
+            )
+            return scope.return_value
+        latex_code = template.render(cell_source, scope, line_args)
         raw_latex_code = "".join(latex_code.replace("\\[", "", 1).rsplit("\\]", 1))
         self.history.append({"return": scope.return_value, "latex": raw_latex_code})
         if self._jupyter_display:
@@ -119,6 +181,124 @@ class HandcalcsCallRecorder:
         return (self._left + raw_latex_code + self._right, scope.return_value)
 
 
+class RecordedCall(Mapping):
+    """
+    A call recorded by a lazy HandcalcsCallRecorder: a read-only mapping
+    with the same "return" and "latex" keys as the calls recorded by an
+    eager one.
+
+    The latex is rendered from copies of the values that the function body
+    referred to, and the config options, at the time of the call, the first
+    time that it is read, and kept after that (see snapshot_value()).
+    """
+
+    _keys = ("return", "latex")
+
+    def __init__(
+        self,
+        return_value: Any,
+        cell_source: str,
+        values: dict,
+        line_args: dict,
+        config_options: dict,
+    ):
+        self.return_value = return_value
+        self.cell_source = cell_source
+        self.values = values
+        self.line_args = line_args
+        self.config_options = config_options
+        self._latex = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        rendered = "rendered" if self._latex is not None else "not rendered"
+        return f"{self.__class__.__name__}(return: {self.return_value!r}, {rendered})"
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "return":
+            return self.return_value
+        if key == "latex":
+            return self.latex
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def latex(self) -> str:
+        """
+        Returns the latex of the call, without the 'left' and 'right'
+        strings, rendering it on first use.
+        """
+        with self._lock:
+            if self._latex is None:
+                latex_code = template.render(
+                    self.cell_source, self.values, self.line_args, self.config_options
+                )
+                self._latex = "".join(latex_code.replace("\\[", "", 1).rsplit("\\]", 1))
+            return self._latex
+
+
+_IMMUTABLE_TYPES = (int, float, complex, bool, str, bytes, type(None))
+_UNCOPIED_TYPES = (
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    types.ModuleType,
+    type,
+)
+
+
+def snapshot_value(value: Any) -> Any:
+    """
+    Returns a deep copy of 'value', as recorded for a lazy call, so that
+    later changes made in place (e.g. to a numpy array) do not show up in
+    its latex. Immutable scalars, functions and modules are returned as
+    they are, as are values that cannot be copied.
+    """
+    if type(value) in _IMMUTABLE_TYPES or isinstance(value, _UNCOPIED_TYPES):
+        return value
+    try:
+        return copy.deepcopy(value)
+    except Exception:
+        try:
+            return copy.copy(value)
+        except Exception:
+            return value
+
+
+_cell_sources = weakref.WeakKeyDictionary()  # {func: (func.__code__, cell source)}
+_cell_sources_lock = threading.Lock()
+
+
+def get_cell_source(func: Callable) -> str:
+    """
+    Returns the cell source of the function 'func' (see _func_source_to_cell()).
+
+    The source is read from disk and extracted once per function and reused
+    on later calls until the function's code object changes (e.g. when
+    func.__code__ is replaced or the function is redefined).
+    """
+    code = getattr(func, "__code__", None)
+    with _cell_sources_lock:
+        try:
+            cached = _cell_sources.get(func)
+        except TypeError:  # Not weak-referenceable
+            cached = None
+    if cached is not None and cached[0] is code:
+        return cached[1]
+    cell_source = _func_source_to_cell(inspect.getsource(func))
+    with _cell_sources_lock:
+        try:
+            _cell_sources[func] = (code, cell_source)
+        except TypeError:
+            pass
+    return cell_source
+
+
 def _func_source_to_cell(source: str):
     """
     Returns a string that represents `source` but with no signature, doc string,
@@ -0,0 +1,263 @@
+"""
+An optional render cache on disk, shared across kernel restarts.
+
+The cache is an SQLite database, render_cache.sqlite3, in the directory set
+with the 'disk_cache_dir' option (disabled when it is ""). Several kernels
+can use the same directory at once: the database runs in WAL mode and every
+write is its own transaction. When the entries take more than
+'disk_cache_max_bytes', the least recently used entries are evicted.
+
+Keys are digests of a canonical text encoding of the render keys (see
+encode_key()) together with the handcalcs version, so any change to the
+source, the options, the fingerprints of the referenced values or the
+version of handcalcs gives a new key, and equal render keys give the same
+key in every process.
+"""
+
+import hashlib
+import pathlib
+import sqlite3
+import sys
+import threading
+import time
+import types
+from typing import Any, Hashable, Optional
+
+from handcalcs import global_config
+
+_FILE_NAME = "render_cache.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+"""
+
+
+class DiskCache:
+    """
+    A size-bounded, least-recently-used cache of str values in an SQLite
+    database at 'path'. Errors from SQLite (e.g. a locked or unwritable
+    database) are treated as cache misses.
+    """
+
+    def __init__(self, path: pathlib.Path):
+        self.path = pathlib.Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()  # sqlite3 connections are per thread
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({str(self.path)!r})"
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the value stored under 'key', or None if there is none.
+        """
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE entries SET accessed = ? WHERE key = ?",
+                    (time.time(), key),
+                )
+        except sqlite3.Error:
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, value: str, max_bytes: int) -> None:
+        """
+        Returns None. Stores 'value' under 'key', then evicts the least
+        recently used entries until the entries take at most 'max_bytes'.
+        """
+        size = len(key) + len(value.encode("utf-8"))
+        try:
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                    (key, value, size, time.time()),
+                )
+                self._evict(connection, max_bytes)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, connection: sqlite3.Connection, max_bytes: int) -> None:
+        (total,) = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        excess = total - max_bytes
+        if excess <= 0:
+            return
+        evicted = []
+        for key, size in connection.execute(
+            "SELECT key, size FROM entries ORDER BY accessed"
+        ):
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        connection.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+    def clear(self) -> None:
+        """
+        Returns None. Removes all entries and resets the hit/miss counters.
+        """
+        try:
+            self._connection().execute("DELETE FROM entries")
+        except sqlite3.Error:
+            pass
+        self.hits = 0
+        self.misses = 0
+
+    def info(self) -> dict:
+        """
+        Returns a dict of the hit/miss counters of this process and the
+        number and total size of the entries on disk.
+        """
+        try:
+            entries, size = (
+                self._connection()
+                .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries")
+                .fetchone()
+            )
+        except sqlite3.Error:
+            entries, size = 0, 0
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "size": size,
+            "max_bytes": global_config._config["disk_cache_max_bytes"],
+        }
+
+
+_disk_caches = {}  # {directory: DiskCache}
+_disk_caches_lock = threading.Lock()
+
+
+def get_disk_cache() -> Optional[DiskCache]:
+    """
+    Returns the DiskCache in the directory set with the 'disk_cache_dir'
+    option, or None if the option is "" (the default).
+    """
+    directory = global_config._config["disk_cache_dir"]
+    if not directory:
+        return None
+    with _disk_caches_lock:
+        disk_cache = _disk_caches.get(directory)
+        if disk_cache is None:
+            path = pathlib.Path(directory).expanduser() / _FILE_NAME
+            disk_cache = _disk_caches[directory] = DiskCache(path)
+    return disk_cache
+
+
+_NAMED_TYPES = (
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    type,
+)
+
+
+class UnencodableKey(Exception):
+    pass
+
+
+def encode_key(item: Any) -> str:
+    """
+    Returns a canonical str of the render key (or part of one) 'item',
+    which is the same for equal keys in any process. Modules, functions and
+    classes, which fingerprint by identity, are encoded by their names.
+
+    Raises UnencodableKey for items whose repr() is not stable across
+    processes (e.g. "<... at 0x...>").
+    """
+    item_type = type(item)
+    if item_type in (tuple, list):
+        items = ",".join(encode_key(sub_item) for sub_item in item)
+        return f"{item_type.__name__}({items})"
+    if item_type in (type(None), bool, int, float, complex, str, bytes):
+        return f"{item_type.__name__}:{item!r}"
+    if isinstance(item, types.ModuleType):
+        return f"module:{item.__name__}"
+    if isinstance(item, _NAMED_TYPES):
+        module = getattr(item, "__module__", None)
+        name = getattr(item, "__qualname__", getattr(item, "__name__", None))
+        if name is None:
+            raise UnencodableKey(repr(item))
+        return f"{type(item).__name__}:{module}.{name}"
+    item_repr = repr(item)
+    if hasattr(item, "__sympy__"):
+        item_repr = sys.modules["sympy"].srepr(item)
+    if " at 0x" in item_repr:
+        raise UnencodableKey(item_repr)
+    return f"{encode_key(item_type)}:{item_repr}"
+
+
+def get_disk_key(render_key: Hashable) -> Optional[str]:
+    """
+    Returns the hex digest of the encoded 'render_key' and the handcalcs
+    version, or None if 'render_key' cannot be encoded.
+    """
+    from handcalcs import __version__
+
+    try:
+        encoded = encode_key((__version__, render_key))
+    except UnencodableKey:
+        return None
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=20).hexdigest()
+
+
+def load(render_key: Hashable) -> Optional[str]:
+    """
+    Returns the output stored on disk for 'render_key', or None if there is
+    none or the disk cache is disabled.
+    """
+    disk_cache = get_disk_cache()
+    if disk_cache is None:
+        return None
+    disk_key = get_disk_key(render_key)
+    if disk_key is None:
+        return None
+    return disk_cache.get(disk_key)
+
+
+def store(render_key: Hashable, output: str) -> None:
+    """
+    Returns None. Stores 'output' on disk under 'render_key' if the disk
+    cache is enabled.
+    """
+    disk_cache = get_disk_cache()
+    if disk_cache is None:
+        return
+    disk_key = get_disk_key(render_key)
+    if disk_key is None:
+        return
+    disk_cache.put(disk_key, output, global_config._config["disk_cache_max_bytes"])
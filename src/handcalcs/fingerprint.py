@@ -0,0 +1,164 @@
+"""
+Cheap fingerprints of the values that handcalcs renders.
+
+A fingerprint is a hashable stand-in for a value: two values with equal
+fingerprints render the same, so render caches can key on fingerprints
+instead of on the values themselves. fingerprint() returns None for values
+that cannot be fingerprinted safely; callers should not cache anything that
+depends on such a value.
+
+The value types are those that latex_repr() handles:
+
+    * None, bool, int, str: the value itself, with its type;
+    * float, complex and numpy scalars: their repr() or bytes, so that equal
+      values that render differently (e.g. -0.0 and 0.0) differ;
+    * numpy arrays: dtype, shape and a blake2b digest of the buffer;
+    * sequences (list, tuple, ...): the fingerprints of their items;
+    * sympy objects: the (immutable, structurally hashed) object itself;
+    * quantities and other objects with a _repr_latex_() method, e.g. pint
+      or forallpeople: the fingerprints of their instance attributes;
+    * functions, classes and modules: the object itself (identity).
+
+Objects that only hash by identity are not fingerprinted, since they could
+have been mutated in place since they were last rendered.
+"""
+
+import hashlib
+import sys
+import types
+from typing import Any, Hashable, Iterable, Optional
+
+MAX_DEPTH = 8  # Nesting depth of sequences and attributes to fingerprint
+
+_IDENTITY_TYPES = (
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    types.ModuleType,
+    type,
+)
+_EXACT_TYPES = (type(None), bool, int, str, bytes)
+
+
+def fingerprint(value: Any, _depth: int = 0) -> Optional[Hashable]:
+    """
+    Returns a hashable fingerprint of 'value' that is only equal for values
+    that render the same, or None if 'value' cannot be fingerprinted.
+    """
+    value_type = type(value)
+    if value_type in _EXACT_TYPES:
+        return (value_type, value)
+    if value_type is float or value_type is complex:
+        return (value_type, repr(value))
+    if isinstance(value, _IDENTITY_TYPES):
+        return value
+    if _depth > MAX_DEPTH:
+        return None
+
+    np = sys.modules.get("numpy")
+    if np is not None:
+        if isinstance(value, np.ndarray):
+            return fingerprint_array(value, _depth)
+        if isinstance(value, np.generic):
+            return (value_type, value.dtype.str, value.tobytes())
+
+    if hasattr(value, "__sympy__"):
+        try:
+            hash(value)
+        except TypeError:  # Mutable sympy matrices
+            return None
+        return (value_type, value)
+
+    if isinstance(value, (list, tuple, range)):
+        return fingerprint_items(value_type, value, _depth)
+
+    if hasattr(value, "_repr_latex_"):
+        return fingerprint_attributes(value, _depth)
+
+    if isinstance(value, (int, float, complex, str)):  # Subclasses
+        return (value_type, repr(value))
+
+    if value_type.__hash__ is None or value_type.__hash__ is object.__hash__:
+        return None
+    try:
+        hash(value)
+    except TypeError:
+        return None
+    return (value_type, value)
+
+
+def fingerprint_array(array, _depth: int = 0) -> Optional[tuple]:
+    """
+    Returns the fingerprint of the numpy array 'array': its type, dtype,
+    shape and a digest of its data.
+    """
+    if array.dtype.hasobject:
+        items = fingerprint_items(list, array.ravel().tolist(), _depth)
+        if items is None:
+            return None
+        return (type(array), array.dtype.str, array.shape, items)
+    contiguous = array if array.flags.c_contiguous else array.copy(order="C")
+    try:
+        data = memoryview(contiguous).cast("B")
+    except (TypeError, ValueError):  # dtypes without buffer support, e.g. datetime64
+        data = contiguous.tobytes()
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    return (type(array), array.dtype.str, array.shape, digest)
+
+
+def fingerprint_items(
+    value_type: type, items: Iterable, _depth: int = 0
+) -> Optional[tuple]:
+    """
+    Returns the fingerprint of a sequence of 'items' of type 'value_type',
+    or None if any of its items cannot be fingerprinted.
+    """
+    fingerprints = []
+    for item in items:
+        item_fingerprint = fingerprint(item, _depth + 1)
+        if item_fingerprint is None:
+            return None
+        fingerprints.append(item_fingerprint)
+    return (value_type, tuple(fingerprints))
+
+
+def fingerprint_attributes(value: Any, _depth: int = 0) -> Optional[tuple]:
+    """
+    Returns the fingerprint of an object by the fingerprints of its
+    instance attributes (from __dict__ and __slots__), or None if it has
+    none or any of them cannot be fingerprinted.
+    """
+    attributes = dict(getattr(value, "__dict__", {}))
+    for cls in type(value).__mro__:
+        slots = getattr(cls, "__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name.startswith("__") or name in attributes:
+                continue
+            if hasattr(value, name):
+                attributes[name] = getattr(value, name)
+    if not attributes:
+        return None
+    fingerprints = []
+    for name in sorted(attributes):
+        attribute_fingerprint = fingerprint(attributes[name], _depth + 1)
+        if attribute_fingerprint is None:
+            return None
+        fingerprints.append((name, attribute_fingerprint))
+    return (type(value), tuple(fingerprints))
+
+
+def fingerprint_names(names: Iterable[str], namespace: dict) -> Optional[tuple]:
+    """
+    Returns a tuple of (name, fingerprint) pairs, in sorted order, for each
+    of 'names' that is defined in 'namespace', or None if the value of any
+    of them cannot be fingerprinted.
+    """
+    fingerprints = []
+    for name in sorted(set(names)):
+        if name not in namespace:
+            continue
+        value_fingerprint = fingerprint(namespace[name])
+        if value_fingerprint is None:
+            return None
+        fingerprints.append((name, value_fingerprint))
+    return tuple(fingerprints)
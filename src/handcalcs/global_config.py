@@ -66,6 +66,28 @@ def save_config() -> None:
         config_file.truncate()
 
 
+_caches = {}  # Populated by handcalcs.caching.LRUCache instances as they are created
+
+
+def cache_info() -> dict:
+    """
+    Returns a dict of the hit/miss statistics and sizes of the render caches,
+    keyed by cache name (e.g. cache_info()["parse"]).
+
+    The maximum size of each cache is set with the corresponding
+    '<name>_cache_size' option. Setting it to 0 disables that cache.
+    """
+    return {name: cache.info() for name, cache in _caches.items()}
+
+
+def clear_caches() -> None:
+    """
+    Returns None. Empties all render caches and resets their statistics.
+    """
+    for cache in _caches.values():
+        cache.clear()
+
+
 set_option.__doc__ = f"""
     Returns None. Sets the value of 'option' to 'value' in the global config.
 
@@ -12,9 +12,12 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
-from collections import deque, ChainMap
+from collections import deque
+import contextlib
+import contextvars
 import copy
 from dataclasses import dataclass
+import functools
 from functools import singledispatch
 import importlib
 import inspect
@@ -24,11 +27,16 @@ import math
 import os
 import pathlib
 import re
-from typing import Any, Union, Optional, Tuple, List
+import sys
+import threading
+from typing import Any, Callable, Union, Optional, Tuple, List
 import pyparsing as pp
 
 from handcalcs.constants import GREEK_UPPER, GREEK_LOWER
 from handcalcs import global_config
+from handcalcs import ast_parser
+from handcalcs import profiling
+from handcalcs.caching import LRUCache
 from handcalcs.integrations import DimensionalityError
 
 
@@ -97,6 +105,14 @@ class BlankLine:  # Attributes not used on BlankLine but still req'd
     latex: str
 
 
+@dataclass
+class LineScan:  # The result of classify_line(), not a line type itself
+    kind: str
+    code: str
+    comment: str
+    tokens: Optional[deque] = None
+
+
 # Five types of cell
 @dataclass
 class CalcCell:
@@ -223,10 +239,11 @@ def latex(
         cell_notation,
     )
     cell = categorize_lines(cell)
-    cell = convert_cell(
-        cell,
-        **config_options,
-    )
+    with conditional_chain():
+        cell = convert_cell(
+            cell,
+            **config_options,
+        )
     cell = format_cell(
         cell,
         **config_options,
@@ -302,6 +319,7 @@ def strip_cell_code(raw_source: str) -> str:
     return raw_source
 
 
+@profiling.timed("stage")
 def categorize_lines(
     cell: Union[CalcCell, ParameterCell],
 ) -> Union[CalcCell, ParameterCell]:
@@ -352,122 +370,101 @@ def categorize_line(
     function has the information of the cell type and can pass along any
     desired behavior to categorize_line().
     """
-    if test_for_blank_line(line):
+    scan = classify_line(line, cell_override)
+    if scan.kind == "blank":
         return BlankLine(line, "", "")
-
-    if test_for_intertext_line(line):
+    elif scan.kind == "intertext":
         return IntertextLine(line, "", "")
+    elif scan.kind == "parameter":
+        return ParameterLine(
+            split_parameter_line(scan.code, calculated_results), scan.comment, ""
+        )
+    elif scan.kind == "conditional":
+        return create_conditional_line(
+            scan.code, calculated_results, cell_override, scan.comment
+        )
+    elif scan.kind == "numeric":
+        return NumericCalcLine(scan.tokens, scan.comment, "")
+    elif scan.kind == "long":
+        return LongCalcLine(scan.tokens, scan.comment, "")  # code_reader
+    elif scan.kind == "symbolic":
+        return SymbolicLine(scan.tokens, scan.comment, "")  # code_reader
+    elif scan.kind == "calc":
+        return CalcLine(scan.tokens, scan.comment, "")  # code_reader
+
+    # TODO: Raise this error in a test
+    raise ValueError(
+        f"Line: {scan.code} is not recognized for rendering.\n"
+        "Lines must either:\n"
+        "\t * Be the name of a previously assigned single variable\n"
+        "\t * Be an arithmetic variable assignment (i.e. calculation that uses '=' in the line)\n"
+        "\t * Be a conditional arithmetic assignment (i.e. uses 'if', 'elif', or 'else', each on a single line)"
+    )
 
-    if line.startswith("#"):
-        return BlankLine(line, "", "")
-
-    if line.endswith("ignore"):
-        return BlankLine(line, "", "")
 
-    try:
-        line, comment = line.split("#", 1)
-    except ValueError:
-        comment = ""
+def classify_line(line: str, cell_override: str = "") -> LineScan:
+    """
+    Returns a LineScan describing which kind of line 'line' is, without
+    creating the line object itself. The line is split from its comment and
+    parsed at most once; the parsed tokens are returned on the LineScan for
+    the kinds that are built from them ("numeric", "long", "symbolic" and
+    "calc").
 
-    # Override behaviour
-    categorized_line = None
-    if cell_override == "parameter":
-        if test_for_conditional_line(line):
-            categorized_line = create_conditional_line(
-                line, calculated_results, cell_override, comment
-            )
-        else:
-            categorized_line = ParameterLine(
-                split_parameter_line(line, calculated_results), comment, ""
-            )
-        return categorized_line
+    The kind is one of "blank", "intertext", "parameter", "conditional",
+    "numeric", "long", "symbolic", "calc", or "unrecognized". The decisions
+    are those of test_for_blank_line(), test_for_intertext_line(),
+    test_for_parameter_line(), test_for_conditional_line() and
+    test_for_numeric_line(), applied according to 'cell_override' (see
+    categorize_line()).
+    """
+    if not line.strip():
+        return LineScan("blank", line, "")
+    if line.startswith("##"):
+        return LineScan("intertext", line, "")
+    if line.startswith("#") or line.endswith("ignore"):
+        return LineScan("blank", line, "")
 
-    elif cell_override == "long":
-        if test_for_parameter_line(line):  # A parameter can exist in a long cell, too
-            categorized_line = ParameterLine(
-                split_parameter_line(line, calculated_results), comment, ""
-            )
-        elif test_for_conditional_line(
-            line
-        ):  # A conditional line can exist in a long cell, too
-            categorized_line = create_conditional_line(
-                line, calculated_results, cell_override, comment
-            )
-        elif test_for_numeric_line(
-            deque(
-                list(expr_parser(line))[1:]
-            )  # Leave off the declared variable, e.g. _x_ = ...
-        ):
-            categorized_line = NumericCalcLine(expr_parser(line), comment, "")
+    code, _, comment = line.partition("#")
+    words = code.split()
+    conditional = ":" in code and ("if" in code or "else" in code)
 
-        else:
-            categorized_line = LongCalcLine(
-                expr_parser(line), comment, ""
-            )  # code_reader
-        return categorized_line
+    if cell_override == "parameter":
+        if conditional:
+            return LineScan("conditional", code, comment)
+        return LineScan("parameter", code, comment)
 
     elif cell_override == "symbolic":
-        if test_for_conditional_line(
-            line
-        ):  # A conditional line can exist in a symbolic cell, too
-            categorized_line = create_conditional_line(
-                line, calculated_results, cell_override, comment
-            )
-        else:
-            categorized_line = SymbolicLine(
-                expr_parser(line), comment, ""
-            )  # code_reader
-        return categorized_line
+        if conditional:
+            return LineScan("conditional", code, comment)
+        return LineScan("symbolic", code, comment, expr_parser(code))
 
     elif cell_override == "short":
-        if test_for_numeric_line(
-            deque(list(line)[1:])  # Leave off the declared variable
-        ):
-            categorized_line = NumericCalcLine(expr_parser(line), comment, "")
-        else:
-            categorized_line = CalcLine(expr_parser(line), comment, "")  # code_reader
-
-        return categorized_line
-    elif True:
-        pass  # Future override conditions to match new cell types can be put here
-
-    # Standard behaviour
-    if line == "\n" or line == "":
-        categorized_line = BlankLine(line, "", "")
-
-    elif test_for_parameter_line(line):
-        categorized_line = ParameterLine(
-            split_parameter_line(line, calculated_results), comment, ""
-        )
-
-    elif test_for_conditional_line(line):
-        categorized_line = create_conditional_line(
-            line, calculated_results, cell_override, comment
-        )
-
-    elif test_for_numeric_line(
-        deque(list(expr_parser(line))[1:])  # Leave off the declared variable
+        # Leave off the declared variable
+        if test_for_numeric_line(deque(list(code)[1:])):
+            return LineScan("numeric", code, comment, expr_parser(code))
+        return LineScan("calc", code, comment, expr_parser(code))
+
+    # A parameter or a conditional line can exist in a long cell, too
+    if words and (
+        len(words) == 1
+        or ("=" in code and "if " not in code and ":" not in code)
+        and test_for_parameter_right_side(code.split("=", 1)[1])
     ):
-        categorized_line = NumericCalcLine(expr_parser(line), comment, "")
-
-    elif "=" in line:
-        categorized_line = CalcLine(expr_parser(line), comment, "")  # code_reader
-
-    elif len(expr_parser(line)) == 1:
-        categorized_line = ParameterLine(
-            split_parameter_line(line, calculated_results), comment, ""
-        )
-
-    else:
-        # TODO: Raise this error in a test
-        raise ValueError(
-            f"Line: {line} is not recognized for rendering.\n"
-            "Lines must either:\n"
-            "\t * Be the name of a previously assigned single variable\n"
-            "\t * Be an arithmetic variable assignment (i.e. calculation that uses '=' in the line)\n"
-            "\t * Be a conditional arithmetic assignment (i.e. uses 'if', 'elif', or 'else', each on a single line)"
-        )
-    return categorized_line
+        return LineScan("parameter", code, comment)
+    elif conditional:
+        return LineScan("conditional", code, comment)
+
+    tokens = expr_parser(code)
+    # Leave off the declared variable, e.g. _x_ = ...
+    if test_for_numeric_line(deque(list(tokens)[1:])):
+        return LineScan("numeric", code, comment, tokens)
+    elif cell_override == "long":
+        return LineScan("long", code, comment, tokens)
+    elif "=" in code:
+        return LineScan("calc", code, comment, tokens)
+    elif len(tokens) == 1:
+        return LineScan("parameter", code, comment)
+    return LineScan("unrecognized", code, comment)
 
 
 def create_param_cell(
@@ -659,6 +656,7 @@ def results_for_intertext(line_object, calculated_results):
     return line_object
 
 
+@profiling.timed("stage")
 @singledispatch
 def convert_cell(
     cell_object,
@@ -740,6 +738,7 @@ def convert_symbolic_cell(cell: SymbolicCell, **config_options) -> SymbolicCell:
     return cell
 
 
+@profiling.timed("line", by_type=True)
 @singledispatch
 def convert_line(
     line_object,
@@ -840,6 +839,7 @@ def convert_blank(line, calculated_results, **config_options):
     return line
 
 
+@profiling.timed("stage")
 @singledispatch
 def format_cell(cell_object, **config_options):
     raise TypeError(
@@ -1026,6 +1026,8 @@ def format_symbolic_cell(cell: SymbolicCell, **config_options) -> str:
     return cell
 
 
+@profiling.timed("stage")
+@profiling.timed("line", by_type=True)
 @singledispatch
 def round_and_render_line_objects_to_latex(
     line: Union[CalcLine, ConditionalLine, ParameterLine],
@@ -1210,13 +1212,60 @@ def render_latex_str(
     return outgoing
 
 
+_format_cache = LRUCache("format", "format_cache_size")
+_FORMAT_CACHE_TYPES = {str, int, float, complex, bool}
+
+
 def latex_repr(
     item: Any, use_scientific_notation: bool, precision: int, preferred_formatter: str
 ) -> str:
     """
     Return a str if the object, 'item', has a special repr method
     for rendering itself in latex. If not, returns str(result).
+
+    Scalars of the built-in types are formatted once per value, precision
+    and notation: the same literal constants and input values recur in
+    every line that uses them.
+    """
+    item_type = type(item)
+    if item_type not in _FORMAT_CACHE_TYPES:
+        return format_latex_repr(
+            item, use_scientific_notation, precision, preferred_formatter
+        )
+    if item_type is float or item_type is complex:
+        value = repr(item)  # Keeps -0.0 apart from 0.0
+    else:
+        value = item
+    cache_key = (
+        item_type,
+        value,
+        use_scientific_notation,
+        precision,
+        preferred_formatter,
+    )
+    rendered_string = _format_cache.get(cache_key)
+    if rendered_string is None:
+        rendered_string = format_latex_repr(
+            item, use_scientific_notation, precision, preferred_formatter
+        )
+        _format_cache.put(cache_key, rendered_string)
+    return rendered_string
+
+
+def format_latex_repr(
+    item: Any, use_scientific_notation: bool, precision: int, preferred_formatter: str
+) -> str:
+    """
+    Returns the latex of 'item' as described in latex_repr(), without
+    looking it up in the format cache.
     """
+    # Check for numpy arrays
+    np = sys.modules.get("numpy")
+    if np is not None and isinstance(item, np.ndarray) and item.ndim:
+        return latex_repr_array(
+            item, use_scientific_notation, precision, preferred_formatter
+        )
+
     # Check for arrays
     if hasattr(item, "__len__") and not isinstance(item, (str, dict)):
         comma_space = ",\\ "
@@ -1240,7 +1289,7 @@ def latex_repr(
 
     # Check for sympy objects
     if hasattr(item, "__sympy__"):
-        return render_sympy(round_sympy(item, precision, use_scientific_notation))
+        return latex_repr_sympy(item, precision, use_scientific_notation)
 
     # Check for scientific notation strings
     if isinstance(item, str) and test_for_scientific_float(item):
@@ -1286,14 +1335,137 @@ def latex_repr(
     return rendered_string.replace("$", "")
 
 
+def latex_repr_array(
+    array: Any, use_scientific_notation: bool, precision: int, preferred_formatter: str
+) -> str:
+    """
+    Returns the latex of the numpy array, 'array', as latex_repr() renders
+    sequences: nested, comma-separated lists in square brackets. Numeric
+    elements are formatted all at once with numpy.char.mod().
+
+    If the array has more elements than the 'array_threshold' option (and
+    the option is not 0), each axis is summarized like numpy does: only its
+    first and last 'array_edgeitems' entries are rendered, around a \\cdots.
+    """
+    threshold = global_config._config["array_threshold"]
+    edgeitems = global_config._config["array_edgeitems"]
+    summarize = 0 < threshold < array.size
+    format_items = functools.partial(
+        format_array_items,
+        use_scientific_notation=use_scientific_notation,
+        precision=precision,
+        preferred_formatter=preferred_formatter,
+    )
+    return format_array_axis(array, summarize, edgeitems, format_items)
+
+
+def format_array_axis(
+    array: Any, summarize: bool, edgeitems: int, format_items: Callable
+) -> str:
+    """
+    Returns the latex of the first axis of 'array', recursing into the
+    others, with the 1-D rows formatted by 'format_items'.
+    """
+    np = sys.modules["numpy"]
+    comma_space = ",\\ "
+    length = array.shape[0]
+    truncated = summarize and length > 2 * edgeitems
+    if truncated:
+        head, tail = array[:edgeitems], array[length - edgeitems :]
+    if array.ndim == 1:
+        if truncated:
+            items = format_items(np.concatenate([head, tail]))
+            items = items[:edgeitems] + ["\\cdots"] + items[edgeitems:]
+        else:
+            items = format_items(array)
+    else:
+        format_row = functools.partial(
+            format_array_axis,
+            summarize=summarize,
+            edgeitems=edgeitems,
+            format_items=format_items,
+        )
+        if truncated:
+            items = [format_row(row) for row in head]
+            items += ["\\cdots"] + [format_row(row) for row in tail]
+        else:
+            items = [format_row(row) for row in array]
+    return "[" + comma_space.join(items) + "]"
+
+
+def format_array_items(
+    items: Any, use_scientific_notation: bool, precision: int, preferred_formatter: str
+) -> List[str]:
+    """
+    Returns a list of the latex_repr() of each element of the 1-D numpy
+    array, 'items'. Integer and float elements are formatted in one call to
+    numpy.char.mod() with the format that latex_repr() would end up using
+    for them; other elements go through latex_repr() one by one.
+    """
+    np = sys.modules["numpy"]
+    if items.dtype.kind not in "fiu" or not items.size:
+        return [
+            latex_repr(item, use_scientific_notation, precision, preferred_formatter)
+            for item in items
+        ]
+    spec = "e" if use_scientific_notation else "f"
+    if preferred_formatter:
+        try:  # latex_repr() tries the preferred formatter first
+            format(items[0], f".{precision}{spec}{preferred_formatter}")
+        except (ValueError, TypeError):
+            pass
+        else:
+            return [
+                latex_repr(
+                    item, use_scientific_notation, precision, preferred_formatter
+                )
+                for item in items
+            ]
+    rendered = np.char.mod(f"%.{precision}{spec}", items).tolist()
+    if use_scientific_notation and preferred_formatter:
+        rendered = [swap_scientific_notation_str(item) for item in rendered]
+    return rendered
+
+
+_sympy_cache = LRUCache("sympy", "sympy_cache_size")
+
+
+def latex_repr_sympy(elem: Any, precision: int, use_scientific_notation: bool) -> str:
+    """
+    Returns the latex of the sympy object 'elem' rounded to 'precision'.
+
+    sympy's printer is slow, so the latex is cached by the expression
+    itself (sympy objects are immutable and hash by structure), its type,
+    'precision' and 'use_scientific_notation'. Mutable objects, e.g. the
+    mutable matrices, are not cached.
+    """
+    try:
+        cache_key = (type(elem), elem, precision, use_scientific_notation)
+        rendered_string = _sympy_cache.get(cache_key)
+    except TypeError:
+        return render_sympy(round_sympy(elem, precision, use_scientific_notation))
+    if rendered_string is None:
+        rendered_string = render_sympy(
+            round_sympy(elem, precision, use_scientific_notation)
+        )
+        _sympy_cache.put(cache_key, rendered_string)
+    return rendered_string
+
+
 def round_sympy(elem: Any, precision: int, use_scientific_notation: bool) -> Any:
     """
-    Returns the Sympy expression 'elem' rounded to 'precision'
+    Returns the Sympy expression 'elem' rounded to 'precision'.
+
+    With the 'sympy_skip_exact' option, expressions without any Float atoms
+    are returned as they are instead of being rebuilt with xreplace().
     """
     from sympy import Float
 
+    floats = elem.atoms(Float)
+    if not floats and global_config._config["sympy_skip_exact"]:
+        return elem
     rule = {}
-    for n in elem.atoms(Float):
+    for n in floats:
         if use_scientific_notation:
             rule[n] = round_for_scientific_notation(n, precision)
         else:
@@ -1572,6 +1744,7 @@ def convert_calc_line_to_long(calc_line: CalcLine) -> LongCalcLine:
     )
 
 
+@profiling.timed("line", by_type=True)
 @singledispatch
 def format_lines(line_object, **config_options):
     """
@@ -1752,6 +1925,15 @@ def test_for_parameter_line(line: str) -> bool:
 
     # Exploratory Tests
     _, right_side = line.split("=", 1)
+    return test_for_parameter_right_side(right_side)
+
+
+def test_for_parameter_right_side(right_side: str) -> bool:
+    """
+    Returns True if 'right_side', the part of a line after the "=", is a
+    single value or a unary operation on one (e.g. "34" or "-a") rather
+    than a calculation.
+    """
     right_side = right_side.replace(" ", "")
 
     if (right_side.find("(") == 0) and (
@@ -1963,6 +2145,12 @@ def format_strings(string: str, comment: bool, **config_options) -> deque:
 
 
 class ConditionalEvaluator:
+    """
+    Tracks the state of an if/elif/else chain while the lines of a cell are
+    converted, so that only the expressions of the first true branch are
+    rendered. Each cell render gets its own (see conditional_chain()).
+    """
+
     def __init__(self):
         self.prev_cond_type = ""
         self.prev_result = False
@@ -1979,7 +2167,7 @@ class ConditionalEvaluator:
             self.prev_cond_type = ""
             self.prev_result = False
         if conditional_type != "else":
-            result = eval_conditional(raw_conditional, **calc_results)
+            result = eval_conditional_with(raw_conditional, calc_results)
         else:
             result = True
         if (
@@ -2032,11 +2220,50 @@ class ConditionalEvaluator:
         return True
 
 
-swap_conditional = (
-    ConditionalEvaluator()
-)  # Instantiate the callable helper class at "Cell" level scope
+_conditional_evaluator = contextvars.ContextVar("conditional_evaluator")
 
 
+@contextlib.contextmanager
+def conditional_chain():
+    """
+    Returns a context manager within which swap_conditional() tracks
+    if/elif/else chains with a new ConditionalEvaluator. Used around each
+    cell render so that renders running at the same time, e.g. in a thread
+    pool, do not share the state of their conditional lines.
+    """
+    token = _conditional_evaluator.set(ConditionalEvaluator())
+    try:
+        yield
+    finally:
+        _conditional_evaluator.reset(token)
+
+
+@profiling.timed("swap")
+def swap_conditional(
+    conditional: deque,
+    conditional_type: str,
+    raw_conditional: str,
+    calc_results: dict,
+    **config_options,
+) -> deque:
+    """
+    Returns the latex of the conditional expression, 'conditional', if it is
+    the branch taken in its if/elif/else chain, or an empty deque otherwise.
+
+    The chain is tracked by the ConditionalEvaluator of the current render
+    (see conditional_chain()). Outside of a render, each thread (or context)
+    has its own ConditionalEvaluator.
+    """
+    evaluator = _conditional_evaluator.get(None)
+    if evaluator is None:
+        evaluator = ConditionalEvaluator()
+        _conditional_evaluator.set(evaluator)
+    return evaluator(
+        conditional, conditional_type, raw_conditional, calc_results, **config_options
+    )
+
+
+@profiling.timed("swap")
 def swap_calculation(calculation: deque, calc_results: dict, **config_options) -> tuple:
     """Returns the python code elements in the deque converted into
     latex code elements in the deque"""
@@ -2046,9 +2273,244 @@ def swap_calculation(calculation: deque, calc_results: dict, **config_options) -
     return (symbolic_portion, numeric_portion)
 
 
+_symbolic_cache = LRUCache("symbolic", "symbolic_cache_size")
+
+
+@profiling.timed("swap")
 def swap_symbolic_calcs(
     calculation: deque, calc_results: dict, **config_options
 ) -> deque:
+    """
+    Returns 'calculation' with its python code elements converted into
+    latex code elements, as a flat deque.
+
+    The symbolic latex of a line does not depend on the calculated values,
+    so it is cached by the line's parsed code and the config options that
+    affect it (see get_symbolic_cache_key()). Re-rendering a cell after
+    only its input values have changed then only redoes the numeric half.
+    """
+    cache_key = get_symbolic_cache_key(calculation, **config_options)
+    if cache_key is None:
+        return swap_symbolic_calcs_fused(calculation, calc_results, **config_options)
+    symbolic_expression = _symbolic_cache.get(cache_key)
+    if symbolic_expression is None:
+        symbolic_expression = tuple(
+            swap_symbolic_calcs_fused(calculation, calc_results, **config_options)
+        )
+        _symbolic_cache.put(cache_key, symbolic_expression)
+    return deque(symbolic_expression)
+
+
+def get_symbolic_cache_key(calculation: deque, **config_options) -> Optional[tuple]:
+    """
+    Returns a hashable key for the symbolic latex of 'calculation' made of
+    its elements (as nested tuples) and the config options used by
+    swap_symbolic_calcs(). Returns None if the symbolic latex cannot be
+    cached: if 'calculation' contains anything other than str elements
+    (e.g. the value of a ParameterLine) or uses quad() or a log function,
+    whose latex is taken from the calculated values.
+    """
+    try:
+        code = _get_symbolic_code_key(calculation)
+        key = (
+            code,
+            tuple(config_options.get("greek_exclusions", [])),
+            config_options.get("underscore_subscripts"),
+            tuple(config_options.get("custom_symbols", {}).items()),
+            tuple(config_options.get("custom_brackets", {}).items()),
+        )
+        hash(key)
+    except (TypeError, ValueError):
+        return None
+    return key
+
+
+def _get_symbolic_code_key(calculation: deque) -> tuple:
+    code = []
+    for item in calculation:
+        if isinstance(item, deque):
+            code.append(_get_symbolic_code_key(item))
+        elif (
+            type(item) is not str
+            or "log" in item
+            or item == "quad"
+            or item == "integrate"
+        ):
+            raise ValueError(item)
+        else:
+            code.append(item)
+    return tuple(code)
+
+
+@profiling.timed("swap")
+def swap_symbolic_calcs_fused(
+    calculation: deque, calc_results: dict, **config_options
+) -> deque:
+    """
+    Returns the same result as swap_symbolic_calcs(), without the cache.
+
+    The passes that change the structure of the expression (parentheses,
+    math functions, superscripts and fractions) each walk the tree once;
+    all of the swaps that act on single elements are then applied together
+    in one last walk that also flattens the result. The result is the
+    same as that of swap_symbolic_calcs_chained(), which is used instead
+    for any line that the combined walk cannot reproduce exactly.
+    """
+    symbolic_expression = insert_parentheses(copy.copy(calculation), **config_options)
+    if config_options.get("custom_symbols") or config_options.get("custom_brackets"):
+        symbolic_expression = swap_items(
+            symbolic_expression,
+            [
+                functools.partial(
+                    swap_custom_symbols_item,
+                    custom_symbols=config_options.get("custom_symbols", {}),
+                ),
+                functools.partial(
+                    swap_custom_brackets_item,
+                    custom_brackets=config_options.get("custom_brackets", {}),
+                ),
+            ],
+        )
+    symbolic_expression = swap_math_funcs(symbolic_expression, calc_results)
+    symbolic_expression = swap_superscripts(symbolic_expression, **config_options)
+    symbolic_expression = swap_chained_fracs(symbolic_expression, **config_options)
+    symbolic_expression = swap_frac_divs(symbolic_expression, **config_options)
+    item_swaps = [
+        swap_py_operators_item,
+        swap_comparison_ops_item,
+        functools.partial(
+            swap_for_greek_item, greek_exclusions=config_options["greek_exclusions"]
+        ),
+        swap_prime_notation_item,
+        functools.partial(
+            swap_long_var_strs_item,
+            underscore_subscripts=config_options["underscore_subscripts"],
+        ),
+        swap_double_subscripts_item,
+        get_subscripts_item_swap(**config_options),
+    ]
+    flat_expression = swap_items_and_flatten(symbolic_expression, item_swaps)
+    if flat_expression is None:
+        return swap_symbolic_calcs_chained(calculation, calc_results, **config_options)
+    return flat_expression
+
+
+@profiling.timed("swap")
+def swap_numeric_calcs(
+    calculation: deque, calc_results: dict, **config_options
+) -> deque:
+    """
+    Returns 'calculation' with its python code elements swapped for their
+    values and converted into latex code elements, as a flat deque.
+
+    As with swap_symbolic_calcs_fused(), the structural passes each walk the tree
+    once and the element swaps (including the swapping in of values) are
+    applied together in one last walk. swap_superscripts() runs before the
+    values are swapped in, rather than after, which is equivalent as long
+    as no value is itself a deque or the str "**"; lines where that is not
+    the case, or that the combined walk otherwise cannot reproduce exactly,
+    use swap_numeric_calcs_chained() instead.
+    """
+    numeric_expression = insert_parentheses(copy.copy(calculation), **config_options)
+    numeric_expression = swap_math_funcs(
+        numeric_expression, calc_results, **config_options
+    )
+    numeric_expression = swap_chained_fracs(numeric_expression, **config_options)
+    numeric_expression = swap_frac_divs(numeric_expression, **config_options)
+    numeric_expression = swap_superscripts(numeric_expression, **config_options)
+    item_swaps = [
+        swap_py_operators_item,
+        swap_comparison_ops_item,
+        functools.partial(swap_values_item, tex_results=calc_results),
+        functools.partial(
+            swap_for_greek_item, greek_exclusions=config_options["greek_exclusions"]
+        ),
+        swap_prime_notation_item,
+        swap_double_subscripts_item,
+        get_subscripts_item_swap(**config_options),
+    ]
+    flat_expression = swap_items_and_flatten(numeric_expression, item_swaps)
+    if flat_expression is None:
+        return swap_numeric_calcs_chained(calculation, calc_results, **config_options)
+    return flat_expression
+
+
+def get_subscripts_item_swap(**config_options) -> Callable:
+    """
+    Returns the element swap for subscripts: extend_subscripts_item() or,
+    if global_config['underscore_subscripts'] == False,
+    replace_underscores_item().
+    """
+    if config_options["underscore_subscripts"]:
+        return extend_subscripts_item
+    return replace_underscores_item
+
+
+def swap_items(d: deque, item_swaps: List[Callable]) -> deque:
+    """
+    Returns a new deque representing 'd' with each of the functions in
+    'item_swaps' applied, in order, to every element that is not a deque.
+    Each function takes the element as its only argument (see
+    swap_symbolic_calcs_fused() for binding the config options).
+    """
+    swapped_deque = deque([])
+    for item in d:
+        if isinstance(item, deque):
+            swapped_deque.append(swap_items(item, item_swaps))
+        else:
+            for item_swap in item_swaps:
+                item = item_swap(item)
+            swapped_deque.append(item)
+    return swapped_deque
+
+
+def swap_items_and_flatten(d: deque, item_swaps: List[Callable]) -> Optional[deque]:
+    """
+    Returns a flat deque of the elements of 'd' with each of the functions
+    in 'item_swaps' applied, in order, to every element, i.e. the result of
+    running the corresponding swap_* passes and flatten_deque() on 'd'.
+
+    Returns None if the result could differ from that of the separate
+    passes: if 'd' contains deque sub-classes (which some passes recurse
+    into and others do not), if an element is swapped for a deque or for
+    the str "**", or if any swap raises, so that the separate passes can
+    report the error as they always have.
+    """
+    flat_deque = deque([])
+    try:
+        if not _swap_items_flat(d, item_swaps, flat_deque):
+            return None
+    except Exception:
+        return None
+    return flat_deque
+
+
+def _swap_items_flat(d: deque, item_swaps: List[Callable], flat_deque: deque) -> bool:
+    for item in d:
+        if type(item) is deque:
+            if not _swap_items_flat(item, item_swaps, flat_deque):
+                return False
+            continue
+        elif isinstance(item, deque):
+            return False
+        for item_swap in item_swaps:
+            item = item_swap(item)
+            if isinstance(item, deque):
+                return False
+        if isinstance(item, str) and item == "**":
+            return False
+        flat_deque.append(item)
+    return True
+
+
+@profiling.timed("swap")
+def swap_symbolic_calcs_chained(
+    calculation: deque, calc_results: dict, **config_options
+) -> deque:
+    """
+    Returns the same result as swap_symbolic_calcs_fused() by running each
+    of the symbolic swap_* passes over the whole of 'calculation' in turn.
+    """
     # remove calc_results function parameter
     symbolic_expression = copy.copy(calculation)
     functions_on_symbolic_expressions = [
@@ -2085,9 +2547,14 @@ def swap_symbolic_calcs(
     return symbolic_expression
 
 
-def swap_numeric_calcs(
+@profiling.timed("swap")
+def swap_numeric_calcs_chained(
     calculation: deque, calc_results: dict, **config_options
 ) -> deque:
+    """
+    Returns the same result as swap_numeric_calcs() by running each of the
+    numeric swap_* passes over the whole of 'calculation' in turn.
+    """
     numeric_expression = copy.copy(calculation)
     functions_on_numeric_expressions = [
         insert_parentheses,
@@ -2121,6 +2588,7 @@ def swap_numeric_calcs(
     return numeric_expression
 
 
+@profiling.timed("swap")
 def swap_integrals(d: deque, calc_results: dict, **config_options) -> deque:
     """
     Returns 'calculation' with any function named "quad" or "integrate"
@@ -2152,6 +2620,7 @@ def swap_integrals(d: deque, calc_results: dict, **config_options) -> deque:
         return d
 
 
+@profiling.timed("swap")
 def swap_custom_symbols(d: deque, **config_options) -> deque:
     """
     Swaps the custom symbols from the 'config_options'.
@@ -2161,23 +2630,32 @@ def swap_custom_symbols(d: deque, **config_options) -> deque:
         if isinstance(item, deque):
             new_item = swap_custom_symbols(item, **config_options)
             swapped_items.append(new_item)
-        elif isinstance(item, str):
-            custom_symbols = config_options.get("custom_symbols", {})
-            new_item = item
-            for symbol, latex_symbol in custom_symbols.items():
-                if (
-                    symbol in new_item
-                ):  # Changed to new_item to allow changes to a string accumulate
-                    new_item = new_item.replace(
-                        symbol, latex_symbol
-                    )  # Changed to new_item to allow changes to a string accumulate
-                    # Removed break to permit multiple replacements
-            swapped_items.append(new_item)
         else:
-            swapped_items.append(item)
+            swapped_items.append(swap_custom_symbols_item(item, **config_options))
     return swapped_items
 
 
+def swap_custom_symbols_item(item: Any, **config_options) -> Any:
+    """
+    Returns 'item', a single (non-deque) element, with the custom symbols
+    from the 'config_options' swapped in.
+    """
+    if not isinstance(item, str):
+        return item
+    custom_symbols = config_options.get("custom_symbols", {})
+    new_item = item
+    for symbol, latex_symbol in custom_symbols.items():
+        if (
+            symbol in new_item
+        ):  # Changed to new_item to allow changes to a string accumulate
+            new_item = new_item.replace(
+                symbol, latex_symbol
+            )  # Changed to new_item to allow changes to a string accumulate
+            # Removed break to permit multiple replacements
+    return new_item
+
+
+@profiling.timed("swap")
 def swap_custom_brackets(d: deque, **config_options) -> deque:
     """
     Swaps custom bracket character or string with their corresponding LaTeX brackets.
@@ -2206,45 +2684,47 @@ def swap_custom_brackets(d: deque, **config_options) -> deque:
     for item in d:
         if isinstance(item, deque):
             new_item = swap_custom_brackets(item, **config_options)
-            swapped_items.append(new_item)
-        elif isinstance(item, str):
-            custom_brackets = config_options.get("custom_brackets", {})
-            new_item = item
-
-            # Process each bracket type
-            for bracket_type, custom_str in custom_brackets.items():
-                if custom_str and custom_str in new_item:
-                    if bracket_type == "parenthesis":
-                        new_item = _replace_alternating_brackets(
-                            new_item, custom_str, "(", ")"
-                        )
-                    elif bracket_type == "square_brackets":
-                        new_item = _replace_alternating_brackets(
-                            new_item, custom_str, "[", "]"
-                        )
-                    elif bracket_type == "angle_brackets":
-                        new_item = _replace_alternating_brackets(
-                            new_item, custom_str, r"\langle", r"\rangle"
-                        )
-                    elif bracket_type == "curly_brackets":
-                        new_item = _replace_alternating_brackets(
-                            new_item, custom_str, r"\lbrace", r"\rbrace"
-                        )
-                    elif bracket_type == "pipes":
-                        new_item = _replace_alternating_brackets(
-                            new_item, custom_str, "|", "|"
-                        )
-                    elif bracket_type == "double_pipes":
-                        new_item = _replace_alternating_brackets(
-                            new_item, custom_str, r"\|", r"\|"
-                        )
-
             swapped_items.append(new_item)
         else:
-            swapped_items.append(item)
+            swapped_items.append(swap_custom_brackets_item(item, **config_options))
     return swapped_items
 
 
+def swap_custom_brackets_item(item: Any, **config_options) -> Any:
+    """
+    Returns 'item', a single (non-deque) element, with the custom brackets
+    from the 'config_options' swapped in. See swap_custom_brackets().
+    """
+    if not isinstance(item, str):
+        return item
+    custom_brackets = config_options.get("custom_brackets", {})
+    new_item = item
+
+    # Process each bracket type
+    for bracket_type, custom_str in custom_brackets.items():
+        if custom_str and custom_str in new_item:
+            if bracket_type == "parenthesis":
+                new_item = _replace_alternating_brackets(new_item, custom_str, "(", ")")
+            elif bracket_type == "square_brackets":
+                new_item = _replace_alternating_brackets(new_item, custom_str, "[", "]")
+            elif bracket_type == "angle_brackets":
+                new_item = _replace_alternating_brackets(
+                    new_item, custom_str, r"\langle", r"\rangle"
+                )
+            elif bracket_type == "curly_brackets":
+                new_item = _replace_alternating_brackets(
+                    new_item, custom_str, r"\lbrace", r"\rbrace"
+                )
+            elif bracket_type == "pipes":
+                new_item = _replace_alternating_brackets(new_item, custom_str, "|", "|")
+            elif bracket_type == "double_pipes":
+                new_item = _replace_alternating_brackets(
+                    new_item, custom_str, r"\|", r"\|"
+                )
+
+    return new_item
+
+
 def _replace_alternating_brackets(
     text: str, custom_str: str, left_bracket: str, right_bracket: str
 ) -> str:
@@ -2276,6 +2756,7 @@ def _replace_alternating_brackets(
     return result
 
 
+@profiling.timed("swap")
 def swap_log_func(d: deque, calc_results: dict, **config_options) -> deque:
     """
     Returns a new deque representing 'd' but with any log functions swapped
@@ -2339,6 +2820,7 @@ def swap_log_func(d: deque, calc_results: dict, **config_options) -> deque:
     return swapped_deque
 
 
+@profiling.timed("swap")
 def swap_floor_ceil(
     d: deque, func_name: str, calc_results: dict, **config_options
 ) -> deque:
@@ -2388,36 +2870,130 @@ def flatten(items: Any, omit_parentheses: bool = False) -> deque:
 def eval_conditional(conditional_str: str, **kwargs) -> str:
     """
     Evals the python code statement, 'conditional_str', based on the variables passed in
-    as an unpacked dict as kwargs. The first line allows the dict values to be added to
-    locals that can be drawn upon to evaluate the conditional_str. Returns bool.
+    as an unpacked dict as kwargs. Returns bool.
+
+    See eval_conditional_with(), which takes the variables as a dict.
     """
-    import sys
+    return eval_conditional_with(conditional_str, kwargs)
+
+
+_conditional_cache = LRUCache("conditional", "conditional_cache_size")
+
+
+def eval_conditional_with(conditional_str: str, calc_results: dict) -> str:
+    """
+    Evals the python code statement, 'conditional_str', using the variables in
+    'calc_results'. Returns bool, or 'conditional_str' itself if it is not valid
+    Python.
+
+    The statement is compiled once and the code object is cached by
+    'conditional_str'. Only the names that the code refers to (its co_names)
+    are looked up in 'calc_results', so the cost does not grow with the size of
+    the namespace. Names that are not in 'calc_results' are looked up in this
+    module's globals and the builtins, as before.
+    """
+    code = _conditional_cache.get(conditional_str)
+    if code is None:
+        try:
+            # It would be good to sanitize the code coming in on 'conditional_str'
+            # Should this code be forced into using only boolean operators?
+            # Do not need to cross this bridge, yet.
+            # Leading spaces and tabs are stripped, as eval() does with a str
+            code = compile(conditional_str.lstrip(" \t"), "<string>", "eval")
+        except SyntaxError:
+            return conditional_str
+        _conditional_cache.put(conditional_str, code)
+    local_vars = {
+        name: calc_results[name] for name in code.co_names if name in calc_results
+    }
+    return eval(code, globals(), local_vars)
 
-    # From Thomas Holder on SO:
-    # https://stackoverflow.com/questions/1897623/
-    # unpacking-a-passed-dictionary-into-the-functions-name-space-in-python
-    exec_str = ",".join(kwargs) + " = kwargs.values()"
-    if int(sys.version.split(".")[1]) >= 13:
-        exec(exec_str, locals=sys._getframe(0).f_locals)
-    else:
-        exec(exec_str)
-    try:
-        # It would be good to sanitize the code coming in on 'conditional_str'
-        # Should this code be forced into using only boolean operators?
-        # Do not need to cross this bridge, yet.
-        return eval(conditional_str)
-    except SyntaxError:
-        return conditional_str
 
+_expr_grammar = None
+_expr_grammar_lock = threading.Lock()
 
-def expr_parser(line: str) -> list:
-    import sys
 
-    sys.setrecursionlimit(3000)
-    pp.ParserElement.enablePackrat()
+def get_expr_grammar() -> pp.ParserElement:
+    """
+    Returns the pyparsing grammar used by expr_parser(), building it on
+    first use. The grammar is shared by all callers (and threads) in the
+    process; use reset_expr_grammar() to force it to be rebuilt.
+    """
+    global _expr_grammar
+    grammar = _expr_grammar
+    if grammar is None:
+        with _expr_grammar_lock:
+            if _expr_grammar is None:
+                if sys.getrecursionlimit() < 3000:
+                    sys.setrecursionlimit(3000)
+                pp.ParserElement.enablePackrat()
+                _expr_grammar = build_expr_grammar()
+            grammar = _expr_grammar
+    return grammar
+
+
+def reset_expr_grammar() -> None:
+    """
+    Returns None. Discards the shared expr_parser() grammar so that it is
+    rebuilt on the next parse, e.g. after changing pyparsing's global
+    settings (default whitespace chars, packrat cache size, etc.).
+    """
+    global _expr_grammar
+    with _expr_grammar_lock:
+        _expr_grammar = None
+
+
+_parse_cache = LRUCache("parse", "parse_cache_size")
+
+
+def expr_parser(line: str) -> deque:
+    """
+    Returns 'line' parsed into a deque of str tokens, with sub-deques for
+    grouped sub-expressions and function calls.
 
+    The 'parser_backend' option selects how the line is parsed: "pyparsing"
+    (the default) uses the grammar from build_expr_grammar(); "ast" uses
+    Python's own parser via handcalcs.ast_parser, which is much faster and
+    produces the same tree, falling back to pyparsing for any line it does
+    not support.
+
+    Parse trees are cached by backend and line text. The cache stores them
+    as immutable tuples and every call returns a newly built deque, so
+    callers are free to mutate the result.
+    """
+    backend = global_config._config.get("parser_backend", "pyparsing")
+    parse_tree = _parse_cache.get((backend, line))
+    if parse_tree is None:
+        parse_tree = parse_expr_line(line, backend)
+        _parse_cache.put((backend, line), parse_tree)
+    return tuple_to_deque(parse_tree)
+
+
+def parse_expr_line(line: str, backend: str = "pyparsing") -> tuple:
+    """
+    Returns 'line' parsed into a tuple of str tokens, with sub-tuples for
+    grouped sub-expressions and function calls, using the parser 'backend'.
+    """
+    if backend == "ast":
+        try:
+            return ast_parser.parse_line(line)
+        except ast_parser.UnsupportedExpression:
+            pass
+    elif backend != "pyparsing":
+        raise ValueError(
+            f"parser_backend must be either 'pyparsing' or 'ast', not '{backend}'."
+        )
+    return list_to_tuple(
+        more_itertools.collapse(get_expr_grammar().parseString(line).asList(), levels=1)
+    )
+
+
+def build_expr_grammar() -> pp.ParserElement:
+    """
+    Returns a newly built pyparsing grammar for a line of Python arithmetic.
+    """
     variable = pp.Word(pp.alphanums + "_.")
-    numbers = pp.pyparsing_common.fnumber.setParseAction("".join)
+    numbers = pp.pyparsing_common.fnumber.copy().setParseAction("".join)
     imag = pp.Literal("j")
     plusminus = pp.oneOf("+ -")
     imag_num = pp.Combine(numbers + imag)
@@ -2446,11 +3022,7 @@ def expr_parser(line: str) -> list:
             (arithop, 2, pp.opAssoc.LEFT),
         ],
     )
-
-    parsed = list_to_deque(
-        more_itertools.collapse(expr.parseString(line).asList(), levels=1)
-    )
-    return parsed
+    return expr
 
 
 # def convert_to_number(x: str):
@@ -2477,6 +3049,23 @@ def list_to_deque(los: List[str]) -> deque:
     return acc
 
 
+def list_to_tuple(los: List[str]) -> tuple:
+    """
+    Return `los` converted into a tuple, with any nested lists also
+    converted into tuples.
+    """
+    return tuple(list_to_tuple(s) if isinstance(s, list) else s for s in los)
+
+
+def tuple_to_deque(tos: tuple) -> deque:
+    """
+    Return `tos` converted into a deque, with any nested tuples also
+    converted into deques.
+    """
+    return deque(tuple_to_deque(s) if isinstance(s, tuple) else s for s in tos)
+
+
+@profiling.timed("swap")
 def swap_double_subscripts(pycode_as_deque: deque, **config_options) -> deque:
     """
     For variables or function names that contain a double subscript '__',
@@ -2486,14 +3075,22 @@ def swap_double_subscripts(pycode_as_deque: deque, **config_options) -> deque:
     for item in pycode_as_deque:
         if isinstance(item, deque):
             new_item = swap_double_subscripts(item)
-        elif isinstance(item, str) and "__" in item:
-            new_item = item.replace("__", "\\ ")
         else:
-            new_item = item
+            new_item = swap_double_subscripts_item(item)
         swapped_deque.append(new_item)
     return swapped_deque
 
 
+def swap_double_subscripts_item(item: Any, **config_options) -> Any:
+    """
+    Returns 'item', a single (non-deque) element, with any double
+    subscript '__' replaced with LaTeX space: "\\ "
+    """
+    if isinstance(item, str) and "__" in item:
+        return item.replace("__", "\\ ")
+    return item
+
+
 def extend_subscripts(pycode_as_deque: deque, **config_options) -> deque:
     """
     For variables named with a subscript, e.g. V_c, this function ensures that any
@@ -2506,25 +3103,31 @@ def extend_subscripts(pycode_as_deque: deque, **config_options) -> deque:
         if isinstance(item, deque):
             new_item = extend_subscripts(item)  # recursion!
             swapped_deque.append(new_item)
-        elif isinstance(item, str) and "_" in item and not "\\int" in item:
-            new_item = ""
-            for char in item:
-                if char == "_":
-                    new_item += char
-                    new_item += "{"
-                else:
-                    new_item += char
-            num_braces = new_item.count("{") - new_item.count(
-                "}"
-            )  # count unclosed braces
-
-            new_item += "}" * num_braces
-            swapped_deque.append(new_item)
         else:
-            swapped_deque.append(item)
+            swapped_deque.append(extend_subscripts_item(item))
     return swapped_deque
 
 
+def extend_subscripts_item(item: Any, **config_options) -> Any:
+    """
+    Returns 'item', a single (non-deque) element, with its subscripts
+    extended as described in extend_subscripts(), e.g. s_ze -> s_{ze}.
+    """
+    if isinstance(item, str) and "_" in item and not "\\int" in item:
+        new_item = ""
+        for char in item:
+            if char == "_":
+                new_item += char
+                new_item += "{"
+            else:
+                new_item += char
+        num_braces = new_item.count("{") - new_item.count("}")  # count unclosed braces
+
+        new_item += "}" * num_braces
+        return new_item
+    return item
+
+
 def replace_underscores(pycode_as_deque: deque, **config_options) -> deque:
     """
     Returns 'pycode_as_deque' with underscores replaced with spaces.
@@ -2535,14 +3138,22 @@ def replace_underscores(pycode_as_deque: deque, **config_options) -> deque:
         if isinstance(item, deque):
             new_item = replace_underscores(item)
             swapped_deque.append(new_item)
-        elif isinstance(item, str):
-            new_item = item.replace("_", "\\ ")
-            swapped_deque.append(new_item)
         else:
-            swapped_deque.append(item)
+            swapped_deque.append(replace_underscores_item(item))
     return swapped_deque
 
 
+def replace_underscores_item(item: Any, **config_options) -> Any:
+    """
+    Returns 'item', a single (non-deque) element, with underscores replaced
+    with spaces.
+    """
+    if isinstance(item, str):
+        return item.replace("_", "\\ ")
+    return item
+
+
+@profiling.timed("swap")
 def swap_chained_fracs(d: deque, **config_options) -> deque:
     """
     Swaps out the division symbol, "/", with a Latex fraction.
@@ -2605,19 +3216,19 @@ def test_for_py_operator(item: str):
     Python binary operators:
     >, <, =
     """
-    py_ops = ["+", "-", "*", "%", "//", "**"]
-    for op in py_ops:
-        if op == str(item):
-            return True
+    item_str = str(item)
+    if item_str in ("+", "-", "*", "%", "//", "**"):
+        return True
 
     bin_ops = "<>="
     for op in bin_ops:
-        if op in str(item):
+        if op in item_str:
             return True
 
     return False
 
 
+@profiling.timed("swap")
 def swap_frac_divs(code: deque, **config_options) -> deque:
     """
     Swaps out the division symbol, "/", with a Latex fraction.
@@ -2663,6 +3274,7 @@ def swap_frac_divs(code: deque, **config_options) -> deque:
     return swapped_deque
 
 
+@profiling.timed("swap")
 def swap_math_funcs(
     pycode_as_deque: deque, calc_results: dict, **config_options
 ) -> deque:
@@ -2790,6 +3402,7 @@ def swap_func_name(d: deque, old: str, new: str = "", **config_options) -> deque
     return swapped_deque
 
 
+@profiling.timed("swap")
 def swap_py_operators(pycode_as_deque: deque, **config_options) -> deque:
     """
     Swaps out Python mathematical operators that do not exist in Latex.
@@ -2802,17 +3415,25 @@ def swap_py_operators(pycode_as_deque: deque, **config_options) -> deque:
             new_item = swap_py_operators(item)  # recursion!
             swapped_deque.append(new_item)
         else:
-            if item == "*":
-                swapped_deque.append("\\cdot")
-            elif item == "%":
-                swapped_deque.append("\\bmod")
-            elif item == ",":
-                swapped_deque.append(",\\ ")
-            else:
-                swapped_deque.append(item)
+            swapped_deque.append(swap_py_operators_item(item))
     return swapped_deque
 
 
+def swap_py_operators_item(item: Any, **config_options) -> Any:
+    """
+    Returns 'item', a single (non-deque) element, swapped for its LaTeX
+    operator if it is one of the Python operators "*", "%", or ",".
+    """
+    if item == "*":
+        return "\\cdot"
+    elif item == "%":
+        return "\\bmod"
+    elif item == ",":
+        return ",\\ "
+    return item
+
+
+@profiling.timed("swap")
 def swap_scientific_notation_str(item: str) -> str:
     """
     Returns a deque representing 'line' with any python
@@ -2839,6 +3460,7 @@ def swap_scientific_notation_str(item: str) -> str:
     return new_item
 
 
+@profiling.timed("swap")
 def swap_scientific_notation_float(
     line: deque, precision: int, **config_options
 ) -> deque:
@@ -2899,31 +3521,42 @@ def swap_scientific_notation_float(
 #     return swapped_deque
 
 
+@profiling.timed("swap")
 def swap_comparison_ops(pycode_as_deque: deque, **config_options) -> deque:
     """
     Returns a deque representing 'pycode_as_deque' with any python
     comparison operators, eg. ">", ">=", "!=", "==" swapped with
     their latex equivalent.
     """
-    py_ops = {
-        "<": "\\lt",
-        ">": "\\gt",
-        "<=": "\\leq",
-        ">=": "\\geq",
-        "==": "=",
-        "!=": "\\neq",
-    }
     swapped_deque = deque([])
     for item in pycode_as_deque:
         if type(item) is deque:
             new_item = swap_comparison_ops(item)
             swapped_deque.append(new_item)
         else:
-            new_item = dict_get(py_ops, item)
-            swapped_deque.append(new_item)
+            swapped_deque.append(swap_comparison_ops_item(item))
     return swapped_deque
 
 
+COMPARISON_OPS = {
+    "<": "\\lt",
+    ">": "\\gt",
+    "<=": "\\leq",
+    ">=": "\\geq",
+    "==": "=",
+    "!=": "\\neq",
+}
+
+
+def swap_comparison_ops_item(item: Any, **config_options) -> Any:
+    """
+    Returns 'item', a single (non-deque) element, swapped for its LaTeX
+    equivalent if it is a python comparison operator.
+    """
+    return dict_get(COMPARISON_OPS, item)
+
+
+@profiling.timed("swap")
 def swap_superscripts(pycode_as_deque: deque, **config_options) -> deque:
     """
     Returns the python code deque with any exponentials swapped
@@ -2972,38 +3605,54 @@ def swap_superscripts(pycode_as_deque: deque, **config_options) -> deque:
     return pycode_with_supers
 
 
+@profiling.timed("swap")
 def swap_for_greek(pycode_as_deque: deque, **config_options) -> deque:
     """
     Returns full line of code as deque with any Greek terms swapped in for words describing
     Greek terms, e.g. 'beta' -> 'β'
     """
-    greeks_to_exclude = config_options["greek_exclusions"]
     swapped_deque = deque([])
-    greek_chainmap = ChainMap(GREEK_LOWER, GREEK_UPPER)
     for item in pycode_as_deque:
         if isinstance(item, deque):
             new_item = swap_for_greek(item, **config_options)
             swapped_deque.append(new_item)
-        elif "_" in str(item):
-            components = str(item).split("_")
-            swapped_components = [
-                (
-                    dict_get(greek_chainmap, component)
-                    if component not in greeks_to_exclude
-                    else component
-                )
-                for component in components
-            ]
-            new_item = "_".join(swapped_components)
-            swapped_deque.append(new_item)
-        elif item not in greeks_to_exclude:
-            new_item = dict_get(greek_chainmap, item)
-            swapped_deque.append(new_item)
         else:
-            swapped_deque.append(item)
+            swapped_deque.append(swap_for_greek_item(item, **config_options))
     return swapped_deque
 
 
+def get_greek(item: Any) -> Any:
+    """
+    Returns the Greek letter that 'item' is the name of, e.g. 'beta' -> 'β',
+    or 'item' if it is not the name of a Greek letter. Lower case letters
+    take precedence, as in ChainMap(GREEK_LOWER, GREEK_UPPER).
+    """
+    try:
+        return GREEK_LOWER[item]
+    except KeyError:
+        return GREEK_UPPER.get(item, item)
+    except TypeError:  # Unhashable values
+        return item
+
+
+def swap_for_greek_item(item: Any, **config_options) -> Any:
+    """
+    Returns 'item', a single (non-deque) element, with any Greek terms
+    swapped in for words describing Greek terms, e.g. 'beta' -> 'β'
+    """
+    greeks_to_exclude = config_options["greek_exclusions"]
+    if "_" in str(item):
+        components = str(item).split("_")
+        swapped_components = [
+            (get_greek(component) if component not in greeks_to_exclude else component)
+            for component in components
+        ]
+        return "_".join(swapped_components)
+    elif item not in greeks_to_exclude:
+        return get_greek(item)
+    return item
+
+
 def test_for_long_var_strs(elem: Any, **config_options) -> bool:
     """
     Returns True if 'elem' is a variable string that has more than one character
@@ -3039,6 +3688,7 @@ def test_for_long_var_strs(elem: Any, **config_options) -> bool:
     return True
 
 
+@profiling.timed("swap")
 def swap_long_var_strs(pycode_as_deque: deque, **config_options) -> deque:
     """
     Returns a new deque that represents 'pycode_as_deque' but
@@ -3048,30 +3698,35 @@ def swap_long_var_strs(pycode_as_deque: deque, **config_options) -> deque:
     ***Must be just before swap_subscripts in stack.***
     """
     swapped_deque = deque([])
-    begin = "\\mathrm{"
-    end = "}"
     for item in pycode_as_deque:
         if isinstance(item, deque):
             new_item = swap_long_var_strs(item, **config_options)
             swapped_deque.append(new_item)
-        elif test_for_long_var_strs(item, **config_options) and not is_number(
-            str(item)
-        ):
-            try:
-                top_level, remainder = str(item).split("_", 1)
-                if config_options["underscore_subscripts"]:
-                    new_item = begin + top_level + end + "_" + remainder
-                else:
-                    new_item = begin + top_level + "_" + remainder + end
-                swapped_deque.append(new_item)
-            except:
-                new_item = begin + item + end
-                swapped_deque.append(new_item)
         else:
-            swapped_deque.append(item)
+            swapped_deque.append(swap_long_var_strs_item(item, **config_options))
     return swapped_deque
 
 
+def swap_long_var_strs_item(item: Any, **config_options) -> Any:
+    """
+    Returns 'item', a single (non-deque) element, "escaped" as upright text
+    if it is a long variable name. See swap_long_var_strs().
+    """
+    begin = "\\mathrm{"
+    end = "}"
+    if test_for_long_var_strs(item, **config_options) and not is_number(str(item)):
+        try:
+            top_level, remainder = str(item).split("_", 1)
+            if config_options["underscore_subscripts"]:
+                return begin + top_level + end + "_" + remainder
+            else:
+                return begin + top_level + "_" + remainder + end
+        except:
+            return begin + item + end
+    return item
+
+
+@profiling.timed("swap")
 def swap_prime_notation(d: deque, **config_options) -> deque:
     """
     Returns a deque representing 'd' with all elements
@@ -3082,14 +3737,22 @@ def swap_prime_notation(d: deque, **config_options) -> deque:
         if isinstance(item, deque):
             new_item = swap_prime_notation(item)
             swapped_deque.append(new_item)
-        elif isinstance(item, str):
-            new_item = item.replace("_prime", "'")
-            swapped_deque.append(new_item)
         else:
-            swapped_deque.append(item)
+            swapped_deque.append(swap_prime_notation_item(item))
     return swapped_deque
 
 
+def swap_prime_notation_item(item: Any, **config_options) -> Any:
+    """
+    Returns 'item', a single (non-deque) element, with any "_prime"
+    substrings replaced with "'".
+    """
+    if isinstance(item, str):
+        return item.replace("_prime", "'")
+    return item
+
+
+@profiling.timed("swap")
 def swap_values(pycode_as_deque: deque, tex_results: dict, **config_options) -> deque:
     """
     Returns a the 'pycode_as_deque' with any symbolic terms swapped out for their corresponding
@@ -3097,21 +3760,26 @@ def swap_values(pycode_as_deque: deque, tex_results: dict, **config_options) ->
     """
     outgoing = deque([])
     for item in pycode_as_deque:
-        swapped_value = ""
         if isinstance(item, deque):
             outgoing.append(
                 swap_values(item, tex_results, **config_options)
             )  # recursion!
         else:
-            swapped_value = dict_get(tex_results, item)
-            if isinstance(swapped_value, str) and swapped_value != item:
-                swapped_value = format_strings(
-                    swapped_value, comment=False, **config_options
-                )
-            outgoing.append(swapped_value)
+            outgoing.append(swap_values_item(item, tex_results, **config_options))
     return outgoing
 
 
+def swap_values_item(item: Any, tex_results: dict, **config_options) -> Any:
+    """
+    Returns 'item', a single (non-deque) element, swapped out for its
+    corresponding value in 'tex_results', if it has one.
+    """
+    swapped_value = dict_get(tex_results, item)
+    if isinstance(swapped_value, str) and swapped_value != item:
+        swapped_value = format_strings(swapped_value, comment=False, **config_options)
+    return swapped_value
+
+
 def test_for_unary(d: deque) -> bool:
     """
     Returns True if 'd' represents a unary expression, e.g. -1.
@@ -3138,7 +3806,7 @@ def get_function_name(d: deque) -> str:
     Returns the function name if 'd' represents a deque containing a function
     name (both typical case and special case).
     """
-    dummy_deque = copy.deepcopy(d)
+    dummy_deque = deque(d)
     dummy_deque.popleft()
     if test_for_function_name(d):
         return d[0]
@@ -3158,6 +3826,9 @@ def get_function_name(d: deque) -> str:
         return ""
 
 
+FUNCTION_NAME_RE = re.compile(r"^[A-Za-z0-9_]+$")
+
+
 def test_for_function_name(d: deque) -> bool:
     """
     Returns True if 'd' qualifies for a typical function that should have
@@ -3165,10 +3836,10 @@ def test_for_function_name(d: deque) -> bool:
     """
     if (
         (len(d) == 2 or len(d) == 4 or len(d) == 3)
-        and (isinstance(d[0], str) and re.match(r"^[A-Za-z0-9_]+$", d[0]))
+        and (isinstance(d[0], str) and FUNCTION_NAME_RE.match(d[0]))
         and (
             isinstance(d[1], str)
-            and (re.match(r"^[A-Za-z0-9_]+$", d[1]) or is_number(d[1]))
+            and (FUNCTION_NAME_RE.match(d[1]) or is_number(d[1]))
             or d[1] == "\\left("
             or d[-1] == "\\right)"
         )
@@ -3177,7 +3848,7 @@ def test_for_function_name(d: deque) -> bool:
     elif (
         len(d) > 1
         and isinstance(d[0], str)
-        and re.match(r"^[A-Za-z0-9_]+$", d[0])
+        and FUNCTION_NAME_RE.match(d[0])
         and isinstance(d[1], deque)
     ):
         return True
@@ -3231,12 +3902,12 @@ def insert_function_parentheses(d: deque) -> deque:
             swapped_deque.append(item)
             swapped_deque.append(rpar)
         elif idx == 1 and isinstance(item, deque):
-            new_item = copy.deepcopy(item)
+            new_item = copy.copy(item)
             new_item.appendleft(lpar)
             new_item.append(rpar)
             swapped_deque.append(new_item)
         elif idx == 2 and isinstance(item, deque) and d[0] == "\\left(":
-            new_item = copy.deepcopy(item)
+            new_item = copy.copy(item)
             new_item.appendleft(lpar)
             new_item.append(rpar)
             swapped_deque.append(new_item)
@@ -3349,6 +4020,7 @@ def test_for_nested_deque(d: deque) -> bool:
     return nested_deque_bool and not_exponent
 
 
+@profiling.timed("swap")
 def swap_dec_sep(d: deque, dec_sep: str) -> deque:
     """
     Returns 'd' with numerical elements with the "." decimal separator,
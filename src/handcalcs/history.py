@@ -0,0 +1,182 @@
+"""
+Bounded call histories for functions decorated with @handcalc(record=True).
+
+By default a recorder keeps every call it records. A HistoryPolicy limits
+the history by number of entries and/or by an estimate of their size in
+memory, keeping either the first or the last entries within the limits, and
+can record only every k-th call:
+
+    @handcalc(record=True, history=HistoryPolicy(max_entries=100))  # last 100
+    @handcalc(record=True, history=HistoryPolicy(max_bytes=2**20, keep="first"))
+    @handcalc(record=True, history=HistoryPolicy(sample_every=10))
+
+Sizes are estimated with sys.getsizeof() when an entry is recorded, following
+containers and instance attributes a few levels deep. Functions, classes and
+modules are not counted since the history does not keep them alive. The
+latex of a lazily recorded call is not counted since it is rendered later.
+"""
+
+from collections import deque
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+import sys
+import threading
+import types
+from typing import Any, Optional
+
+MAX_DEPTH = 4  # Nesting depth of containers and attributes to follow
+
+_UNCOUNTED_TYPES = (
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    types.ModuleType,
+    type,
+)
+
+
+@dataclass
+class HistoryPolicy:
+    """
+    Which calls a recorder keeps in its history.
+
+    'max_entries' and 'max_bytes' (None for no limit) bound the number and
+    the estimated size of the kept entries. With keep="last", the oldest
+    entries are dropped to make room, as in a ring buffer; with
+    keep="first", calls are no longer recorded once a limit is reached.
+    With 'sample_every' = k, only every k-th call is recorded, starting
+    with the first.
+    """
+
+    max_entries: Optional[int] = None
+    max_bytes: Optional[int] = None
+    keep: str = "last"
+    sample_every: int = 1
+
+    def __post_init__(self):
+        if self.keep not in ("first", "last"):
+            raise ValueError(f"keep must be 'first' or 'last', not {self.keep!r}.")
+        if self.sample_every < 1:
+            raise ValueError(
+                f"sample_every must be at least 1, not {self.sample_every}."
+            )
+        for name in ("max_entries", "max_bytes"):
+            limit = getattr(self, name)
+            if limit is not None and limit < 0:
+                raise ValueError(f"{name} must be None or at least 0, not {limit}.")
+
+
+class CallHistory(Sequence):
+    """
+    The recorded calls of a HandcalcsCallRecorder, in order, as kept by its
+    HistoryPolicy. Indexing and iteration work as on the list it replaces.
+    """
+
+    def __init__(self, policy: Optional[HistoryPolicy] = None):
+        self.policy = policy if policy is not None else HistoryPolicy()
+        self.calls = 0  # Calls offered to the history, whether kept or not
+        self.dropped = 0  # Calls not kept, or kept and evicted later
+        self.nbytes = 0  # Estimated size of the kept entries
+        self._entries = deque()  # (entry, size)
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}({len(self._entries)} entries,"
+            f" ~{format_bytes(self.nbytes)}, dropped: {self.dropped})"
+        )
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [entry for entry, _ in list(self._entries)[idx]]
+        return self._entries[idx][0]
+
+    def __iter__(self):
+        return (entry for entry, _ in list(self._entries))
+
+    def append(self, entry: Any, size: Optional[int] = None) -> bool:
+        """
+        Returns True if 'entry', the next recorded call, was kept according
+        to the policy, False otherwise. 'size' is the estimated size of the
+        entry in bytes; if None, it is estimated with estimate_size().
+        """
+        policy = self.policy
+        if size is None:
+            size = estimate_size(entry)
+        with self._lock:
+            self.calls += 1
+            if (self.calls - 1) % policy.sample_every:
+                self.dropped += 1
+                return False
+            if policy.keep == "first" and not self._fits(1, size):
+                self.dropped += 1
+                return False
+            self._entries.append((entry, size))
+            self.nbytes += size
+            while self._entries and not self._fits(0, 0):
+                _, evicted_size = self._entries.popleft()
+                self.nbytes -= evicted_size
+                self.dropped += 1
+            return bool(self._entries) and self._entries[-1][0] is entry
+
+    def _fits(self, entries: int, size: int) -> bool:
+        max_entries = self.policy.max_entries
+        max_bytes = self.policy.max_bytes
+        if max_entries is not None and len(self._entries) + entries > max_entries:
+            return False
+        if max_bytes is not None and self.nbytes + size > max_bytes:
+            return False
+        return True
+
+    def clear(self) -> None:
+        """
+        Returns None. Removes all entries and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.calls = 0
+            self.dropped = 0
+            self.nbytes = 0
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Returns an estimate of the memory, in bytes, taken by 'value' and the
+    objects it holds.
+    """
+    if isinstance(value, _UNCOUNTED_TYPES):
+        return 0
+    try:
+        size = sys.getsizeof(value)  # Includes the data of numpy arrays
+    except TypeError:
+        return 0
+    if _depth >= MAX_DEPTH or isinstance(value, (str, bytes, bytearray)):
+        return size
+    if isinstance(value, Mapping):
+        try:
+            items = list(value.items())
+        except Exception:
+            return size
+        for key, item in items:
+            size += estimate_size(key, _depth + 1) + estimate_size(item, _depth + 1)
+    elif isinstance(value, (list, tuple, set, frozenset, deque)):
+        for item in value:
+            size += estimate_size(item, _depth + 1)
+    elif hasattr(value, "__dict__") and not hasattr(value, "__array_interface__"):
+        size += estimate_size(vars(value), _depth + 1)
+    return size
+
+
+def format_bytes(nbytes: int) -> str:
+    """
+    Returns 'nbytes' as a short, human-readable str, e.g. "1.5 MiB".
+    """
+    size = float(nbytes)
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
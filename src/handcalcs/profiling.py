@@ -0,0 +1,218 @@
+"""
+Opt-in timing of the render pipeline.
+
+Functions of the pipeline are decorated with timed(). While a profile is
+active, e.g.
+
+    with handcalcs.profiling.profile() as prof:
+        ...render some cells...
+    print(prof.table())
+
+each call of a decorated function is counted and its wall time is added to
+the profile. Without an active profile, a decorated function only costs one
+extra function call and a context variable lookup.
+
+Timings are kept in three categories:
+
+    * "stage": the pipeline stages (categorize_lines, convert_cell,
+      format_cell, round_and_render_line_objects_to_latex). Stages can
+      nest; format_cell includes round_and_render_line_objects_to_latex.
+    * "line": the per-line functions, keyed by the type of line, e.g.
+      "convert_line(CalcLine)".
+    * "swap": the swap_* functions.
+
+Recursive calls of a function are counted but their time is only added once.
+When the profile ends, the hits and misses of each render cache during the
+profile (see handcalcs.cache_info()) are added to it as well.
+"""
+
+import contextlib
+import contextvars
+import functools
+import time
+from typing import Callable
+
+from handcalcs import global_config
+
+_current_profile = contextvars.ContextVar("current_profile", default=None)
+
+
+class RenderProfile:
+    """
+    Accumulates the call counts and wall times recorded by timed()
+    functions.
+    """
+
+    def __init__(self):
+        self.stats = {}  # {(category, name): [calls, seconds]}
+        self.caches = {}  # {cache name: {"hits": int, "misses": int}}
+        self._running = set()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self.stats)} entries)"
+
+    def __str__(self):
+        return self.table()
+
+    def as_dict(self) -> dict:
+        """
+        Returns a dict of {category: {name: {"calls": int, "time": float}}},
+        with 'time' in seconds and the names of each category in descending
+        order of time. The cache statistics are under the "cache" category
+        as {name: {"hits": int, "misses": int, "hit_rate": float}}.
+        """
+        profile = {}
+        for (category, name), (calls, seconds) in sorted(
+            self.stats.items(), key=lambda item: -item[1][1]
+        ):
+            profile.setdefault(category, {})[name] = {"calls": calls, "time": seconds}
+        for name, counts in self.caches.items():
+            lookups = counts["hits"] + counts["misses"]
+            if not lookups:
+                continue
+            profile.setdefault("cache", {})[name] = {
+                "hits": counts["hits"],
+                "misses": counts["misses"],
+                "hit_rate": counts["hits"] / lookups,
+            }
+        return profile
+
+    def table(self) -> str:
+        """
+        Returns the profile as a plain text table with one row per function,
+        grouped by category, followed by a table of the cache hit rates.
+        """
+        profile = self.as_dict()
+        cache_entries = profile.pop("cache", {})
+        rows = [("category", "name", "calls", "time (ms)", "per call (us)")]
+        for category, entries in profile.items():
+            for name, entry in entries.items():
+                calls = entry["calls"]
+                seconds = entry["time"]
+                rows.append(
+                    (
+                        category,
+                        name,
+                        str(calls),
+                        f"{seconds * 1e3:.3f}",
+                        f"{seconds * 1e6 / calls:.1f}",
+                    )
+                )
+        table = format_table(rows, left_columns=2)
+        if cache_entries:
+            rows = [("cache", "hits", "misses", "hit rate")]
+            for name, entry in cache_entries.items():
+                rows.append(
+                    (
+                        name,
+                        str(entry["hits"]),
+                        str(entry["misses"]),
+                        f"{entry['hit_rate']:.1%}",
+                    )
+                )
+            table += "\n\n" + format_table(rows, left_columns=1)
+        return table
+
+    def record(self, category: str, name: str, func: Callable, args, kwargs):
+        """
+        Returns the result of func(*args, **kwargs), adding the call and its
+        wall time to the profile under (category, name).
+        """
+        key = (category, name)
+        entry = self.stats.get(key)
+        if entry is None:
+            entry = self.stats[key] = [0, 0.0]
+        entry[0] += 1
+        if key in self._running:
+            return func(*args, **kwargs)
+        self._running.add(key)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            entry[1] += time.perf_counter() - start
+            self._running.discard(key)
+
+
+def format_table(rows: list, left_columns: int) -> str:
+    """
+    Returns 'rows' (tuples of str, the first being the header) as a plain
+    text table, with the first 'left_columns' columns left-aligned and the
+    others right-aligned.
+    """
+    widths = [max(len(row[idx]) for row in rows) for idx in range(len(rows[0]))]
+    lines = []
+    for row in rows:
+        cells = [
+            cell.ljust(width) if idx < left_columns else cell.rjust(width)
+            for idx, (cell, width) in enumerate(zip(row, widths))
+        ]
+        lines.append("  ".join(cells).rstrip())
+    lines.insert(1, "-" * len(lines[0]))
+    return "\n".join(lines)
+
+
+def get_cache_counts() -> dict:
+    """
+    Returns a dict of {cache name: (hits, misses)} of the render caches.
+    """
+    return {
+        name: (info["hits"], info["misses"])
+        for name, info in global_config.cache_info().items()
+    }
+
+
+@contextlib.contextmanager
+def profile():
+    """
+    Returns a context manager that yields a new RenderProfile and records
+    the timings of all renders within the context into it, along with the
+    cache hits and misses during the context.
+
+    The cache counters are shared by all threads, so renders running
+    concurrently outside of the context are counted as well.
+    """
+    render_profile = RenderProfile()
+    counts_before = get_cache_counts()
+    token = _current_profile.set(render_profile)
+    try:
+        yield render_profile
+    finally:
+        _current_profile.reset(token)
+        for name, (hits, misses) in get_cache_counts().items():
+            hits_before, misses_before = counts_before.get(name, (0, 0))
+            if hits < hits_before or misses < misses_before:  # Cleared meanwhile
+                hits_before, misses_before = 0, 0
+            render_profile.caches[name] = {
+                "hits": hits - hits_before,
+                "misses": misses - misses_before,
+            }
+
+
+def timed(category: str, by_type: bool = False) -> Callable:
+    """
+    Returns a decorator that records the calls of the decorated function
+    under 'category' in the active profile, if there is one. With 'by_type',
+    calls are recorded per type of the first argument (e.g. the line type).
+
+    The attributes of the decorated function, e.g. .register() of a
+    singledispatch function, are kept on the wrapper.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            render_profile = _current_profile.get()
+            if render_profile is None:
+                return func(*args, **kwargs)
+            if by_type:
+                key = f"{name}({type(args[0]).__name__})"
+            else:
+                key = name
+            return render_profile.record(category, key, func, args, kwargs)
+
+        return wrapper
+
+    return decorator
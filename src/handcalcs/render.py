@@ -13,9 +13,16 @@
 #    limitations under the License.
 
 
+import contextlib
 import sys
+from typing import Optional
+from . import disk_cache
+from . import global_config
 from . import handcalcs as hand
+from . import profiling
 from . import sympy_kit as s_kit
+from .caching import LRUCache
+from .fingerprint import fingerprint_names
 
 try:
     from IPython.core.magic import (
@@ -42,6 +49,9 @@ except AttributeError:
     )
 
 from report.renderer import ReportRenderer
+from report.formatters import NAME_RE
+
+_render_cache = LRUCache("render", "render_cache_size")
 
 def parse_line_args(line: str) -> dict:
     """
@@ -53,13 +63,22 @@ def parse_line_args(line: str) -> dict:
     # valid_args = ["params", "long", "short", "sympy", "symbolic", "_testing"]
     sympy_arg = ["sympy"]
     line_parts = line.split()
-    parsed_args = {"override": "", "precision": None, "sympy": False, "sci_not": None}
+    parsed_args = {
+        "override": "",
+        "precision": None,
+        "sympy": False,
+        "sci_not": None,
+        "profile": False,
+    }
     # parsed_args = {
     #     "override": "",
     #     "precision": "",
     # }
     precision = ""
     for arg in line_parts:
+        if arg.lower() == "--profile":
+            parsed_args["profile"] = True
+            continue
         if arg.lower() in sympy_arg:
             parsed_args["sympy"] = True
             continue
@@ -78,6 +97,67 @@ def parse_line_args(line: str) -> dict:
     return parsed_args
 
 
+def profile_render(line_args: dict):
+    """
+    Returns a context manager that yields a RenderProfile of the render if
+    the --profile flag was passed on the cell magic, or None otherwise.
+    """
+    if line_args["profile"]:
+        return profiling.profile()
+    return contextlib.nullcontext()
+
+
+def get_render_key(line: str, cell: str, user_ns: dict) -> Optional[tuple]:
+    """
+    Returns a hashable key for the rendered output of 'cell', made of the
+    magic's 'line', the cell source, the fingerprints of the values in
+    'user_ns' of the names that the cell references and the render options.
+    Returns None if any of the values cannot be fingerprinted.
+    """
+    values = fingerprint_names(NAME_RE.findall(cell), user_ns)
+    if values is None:
+        return None
+    options_key = repr(sorted(global_config._config.items()))
+    return (line, cell, values, options_key)
+
+
+def render_cell(line: str, cell: str, user_ns: dict) -> str:
+    """
+    Returns the rendered LaTeX (or Markdown, for "input" and "report" cells)
+    of 'cell', which has already been run in 'user_ns'.
+
+    If the cell was rendered before with the same source, options and values
+    of the names it references, the previous output is returned without
+    running the render pipeline again (except with --profile). Outputs are
+    also looked up in the disk cache, if enabled with the 'disk_cache_dir'
+    option, so that they survive kernel restarts.
+    """
+    line_args = parse_line_args(line)
+    key = None if line_args["profile"] else get_render_key(line, cell, user_ns)
+    if key is not None:
+        output = _render_cache.get(key)
+        if output is None:
+            output = disk_cache.load(key)
+            if output is not None:
+                _render_cache.put(key, output)
+        if output is not None:
+            return output
+
+    if line_args["override"] in ("input", "report"):
+        renderer = ReportRenderer(cell, user_ns, line_args)
+    else:
+        renderer = hand.LatexRenderer(cell, user_ns, line_args)
+    with profile_render(line_args) as render_profile:
+        output = renderer.render()
+    if render_profile is not None:
+        print(render_profile.table())
+
+    if key is not None:
+        _render_cache.put(key, output)
+        disk_cache.store(key, output)
+    return output
+
+
 @register_line_magic
 def decimal_separator(line):
     if len(line) == 1:
@@ -103,19 +183,15 @@ def render(line, cell):
     # Retrieve updated variables (after .run_cell(cell))
     user_ns_postrun = ip.user_ns
 
+    output = render_cell(line, cell, user_ns_postrun)
+
     # SAFE branching (selection only)
     override = line_args.get("override")
 
     if override in ("input", "report"):
-        renderer = ReportRenderer(cell, user_ns_postrun, line_args)
-        markdown = renderer.render()
-        display(Markdown(markdown))
-        output = markdown
+        display(Markdown(output))
     else:
-        renderer = hand.LatexRenderer(cell, user_ns_postrun, line_args)
-        latex_code = renderer.render()
-        display(Latex(latex_code))
-        output = latex_code
+        display(Latex(output))
 
     if line_args["override"] == "_testing":
         return output
@@ -139,17 +215,8 @@ def tex(line, cell):
     # Retrieve updated variables (after .run_cell(cell))
     user_ns_postrun = ip.user_ns
 
-    override = line_args.get("override")
-    if override in ("input", "report"):
-        renderer = ReportRenderer(cell, user_ns_postrun, line_args)
-        markdown = renderer.render()
-        print(markdown)
-        output = markdown
-    else:
-        renderer = hand.LatexRenderer(cell, user_ns_postrun, line_args)
-        latex_code = renderer.render()
-        print(latex_code)
-        output = latex_code
+    output = render_cell(line, cell, user_ns_postrun)
+    print(output)
 
     if line_args["override"] == "_testing":
         return output
@@ -0,0 +1,329 @@
+"""
+Parameter sweeps of @handcalc functions rendered as one block.
+
+    result = sweep(beam, w=[1.5, 2.0, 2.5], L=np.linspace(4, 8, 5))
+    result.latex  # The symbolic calculation and a table of all cases
+
+The keyword arrays are broadcast together (scalars are repeated) and each
+element is one case. The function body is first run once with the whole
+arrays, for bodies that support numpy broadcasting; that run is used if
+each of its values has the shape of the cases (or is a scalar) and its
+first, middle and last cases match separate runs of those cases alone.
+Otherwise the body is run once per case, in a thread pool when 'workers'
+is more than 1.
+
+sweep() requires numpy, which is only imported when it is called.
+
+The output is the symbolic form of the calculation followed by a table
+with one row per case and a column for each varying input and each name
+that the body assigns. Sweeps with more than 'sweep_max_rows' cases only
+show the first and last 'array_edgeitems' rows. Conditional lines are
+rendered as they are for the first case.
+"""
+
+import ast
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from dataclasses import dataclass
+import textwrap
+from typing import Any, Callable, Optional
+
+import innerscope
+
+from handcalcs import global_config
+from handcalcs.decorator import get_cell_source
+from handcalcs.handcalcs import (
+    categorize_lines,
+    categorize_raw_cell,
+    conditional_chain,
+    convert_cell,
+    format_cell,
+    latex_repr,
+    swap_dec_sep,
+    swap_symbolic_calcs,
+    toggle_scientific_notation,
+)
+
+
+@dataclass
+class SweepResult:
+    """
+    The rendered latex and the values of every case of a sweep. 'inputs'
+    and 'results' map each name to a list of its value in each case.
+    """
+
+    latex: str
+    inputs: dict
+    results: dict
+    return_values: list
+    vectorized: bool
+
+    def __len__(self):
+        return len(self.return_values)
+
+    def _repr_latex_(self):
+        return self.latex
+
+
+def sweep(func: Callable, workers: Optional[int] = None, **arrays) -> SweepResult:
+    """
+    Returns a SweepResult of calling the @handcalc function 'func' with the
+    keyword arguments in 'arrays' broadcast together, one case per element.
+    """
+    if not arrays:
+        raise ValueError("sweep() needs at least one keyword array of inputs.")
+    try:
+        import numpy as np
+    except ModuleNotFoundError:
+        raise ModuleNotFoundError("sweep() requires numpy to be installed.")
+    body = getattr(func, "__wrapped__", func)
+    line_args = getattr(func, "line_args", None) or {
+        "override": "",
+        "precision": None,
+        "sci_not": None,
+    }
+    config_options = dict(global_config._config)
+    cell_source = get_cell_source(body)
+
+    names = list(arrays)
+    broadcast = np.broadcast_arrays(*(np.asarray(arrays[name]) for name in names))
+    inputs = {name: array.ravel().tolist() for name, array in zip(names, broadcast)}
+    count = broadcast[0].size
+    if count == 0:
+        raise ValueError("sweep() needs at least one case: the inputs are empty.")
+    varying = [name for name in names if np.asarray(arrays[name]).size > 1]
+    assigned = get_assigned_names(cell_source)
+
+    checked_scopes = {
+        idx: innerscope.call(body, **{name: inputs[name][idx] for name in names})
+        for idx in (0, count // 2, count - 1)
+    }
+    first_scope = checked_scopes[0]
+    results, return_values = run_vectorized(
+        body, broadcast, names, assigned, checked_scopes
+    )
+    vectorized = results is not None
+    if not vectorized:
+        results, return_values = run_cases(
+            body, inputs, names, assigned, count, workers, checked_scopes
+        )
+
+    symbolic_latex = render_symbolic_lines(
+        cell_source, dict(first_scope), line_args, config_options
+    )
+    columns = varying + [name for name in assigned if name not in varying]
+    values = {**results, **{name: inputs[name] for name in varying}}
+    table = render_sweep_table(
+        columns, values, count, len(varying), line_args, config_options
+    )
+    line_break = f"{config_options['line_break']}\n"
+    opener = config_options["latex_block_start"]
+    begin = f"\\begin{{{config_options['math_environment_start']}}}"
+    end = f"\\end{{{config_options['math_environment_end']}}}"
+    closer = config_options["latex_block_end"]
+    latex_block = line_break.join(filter(None, [symbolic_latex, f"&{table}"]))
+    latex_code = "\n".join([opener, begin, latex_block, end, closer])
+    return SweepResult(latex_code, inputs, results, return_values, vectorized)
+
+
+def get_assigned_names(cell_source: str) -> list:
+    """
+    Returns a list of the names assigned in 'cell_source', in the order of
+    their first assignment.
+    """
+    tree = ast.parse(textwrap.dedent(cell_source))
+    assigned = sorted(
+        (node.lineno, node.col_offset, node.id)
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load)
+    )
+    return list(dict.fromkeys(name for *_, name in assigned))
+
+
+def run_vectorized(
+    body: Callable,
+    broadcast: list,
+    names: list,
+    assigned: list,
+    checked_scopes: dict,
+) -> tuple:
+    """
+    Returns a tuple of the results ({name: list of values}) and the return
+    values of all cases from one call of 'body' with the whole arrays, or
+    (None, None) if the body does not broadcast or if any case in
+    'checked_scopes' ({case index: scope of a run of that case alone})
+    differs, as for bodies that are not elementwise (e.g. w - np.min(w)).
+    """
+    import numpy as np
+
+    first_scope = checked_scopes[0]
+    try:
+        with np.errstate(all="ignore"):
+            scope = innerscope.call(
+                body, **{name: array for name, array in zip(names, broadcast)}
+            )
+        results = {}
+        for name in assigned:
+            if name not in scope:
+                return None, None
+            results[name] = split_cases(scope[name], broadcast[0].shape)
+        if scope.return_value is None and first_scope.return_value is None:
+            return_values = [None] * broadcast[0].size
+        else:
+            return_values = split_cases(scope.return_value, broadcast[0].shape)
+    except Exception:  # The body does not support arrays, e.g. math.sqrt or if
+        return None, None
+    if return_values is None or any(values is None for values in results.values()):
+        return None, None
+    for idx, checked_scope in checked_scopes.items():
+        for name, values in results.items():
+            if not values_match(values[idx], checked_scope[name]):
+                return None, None
+        if return_values[idx] is not None and not values_match(
+            return_values[idx], checked_scope.return_value
+        ):
+            return None, None
+    return results, return_values
+
+
+def split_cases(value: Any, shape: tuple) -> Optional[list]:
+    """
+    Returns a list of the value of each case in 'value', the result of a
+    vectorized run over arrays of 'shape', or None if 'value' is not a
+    numeric array of 'shape' or a numeric scalar.
+    """
+    import numpy as np
+
+    array = np.asarray(value)
+    if array.dtype.kind not in "biufc" or array.shape not in ((), shape):
+        return None
+    return np.broadcast_to(array, shape).ravel().tolist()
+
+
+def run_cases(
+    body: Callable,
+    inputs: dict,
+    names: list,
+    assigned: list,
+    count: int,
+    workers: Optional[int],
+    checked_scopes: dict,
+) -> tuple:
+    """
+    Returns a tuple of the results ({name: list of values}) and the return
+    values of all cases from one call of 'body' per case. The cases in
+    'checked_scopes' ({case index: scope}) were already run and are reused.
+    """
+
+    def run_case(idx):
+        if idx in checked_scopes:
+            return checked_scopes[idx]
+        return innerscope.call(body, **{name: inputs[name][idx] for name in names})
+
+    if workers is not None and workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            scopes = list(executor.map(run_case, range(count)))
+    else:
+        scopes = [run_case(idx) for idx in range(count)]
+    results = {
+        name: [scope[name] if name in scope else None for scope in scopes]
+        for name in assigned
+    }
+    return results, [scope.return_value for scope in scopes]
+
+
+def values_match(value: Any, expected: Any) -> bool:
+    """
+    Returns True if 'value', from the vectorized run, equals 'expected',
+    from the run of a single case (NaNs being equal).
+    """
+    import numpy as np
+
+    try:
+        return bool(np.array_equal(value, expected, equal_nan=True))
+    except Exception:
+        return False
+
+
+def render_symbolic_lines(
+    cell_source: str, calculated_results: dict, line_args: dict, config_options: dict
+) -> str:
+    """
+    Returns the latex lines of the symbolic form of 'cell_source', as in a
+    "symbolic" cell, without the latex block around them.
+    """
+    cell = categorize_raw_cell(
+        cell_source,
+        calculated_results,
+        "symbolic",
+        line_args["precision"],
+        line_args["sci_not"],
+    )
+    cell = categorize_lines(cell)
+    with conditional_chain():
+        cell = convert_cell(cell, **config_options)
+    cell = format_cell(cell, **config_options)
+    line_break = f"{config_options['line_break']}\n"
+    return line_break.join([line.latex for line in cell.lines if line.latex])
+
+
+def render_sweep_table(
+    columns: list,
+    values: dict,
+    count: int,
+    input_columns: int,
+    line_args: dict,
+    config_options: dict,
+) -> str:
+    """
+    Returns a latex array with a header of the symbols of 'columns' and one
+    row of the values of each case, with a rule after the first
+    'input_columns' columns.
+    """
+    precision = line_args["precision"]
+    if precision is None:
+        precision = config_options["display_precision"]
+    # The notation is toggled as in a cell (see template.compile_template())
+    use_scientific_notation = toggle_scientific_notation(
+        config_options["use_scientific_notation"],
+        toggle_scientific_notation(
+            config_options["use_scientific_notation"], line_args["sci_not"]
+        ),
+    )
+
+    def render_value(value):
+        value_latex = latex_repr(
+            value,
+            use_scientific_notation,
+            precision,
+            config_options["preferred_string_formatter"],
+        )
+        value_latex = swap_dec_sep(
+            deque([value_latex]), config_options["decimal_separator"]
+        )
+        return value_latex[0]
+
+    max_rows = config_options["sweep_max_rows"]
+    edgeitems = config_options["array_edgeitems"]
+    if count > max_rows and count > 2 * edgeitems:
+        rows = list(range(edgeitems)) + [None] + list(range(count - edgeitems, count))
+    else:
+        rows = list(range(count))
+
+    alignment = "c" * input_columns + "|" * bool(input_columns)
+    alignment += "c" * (len(columns) - input_columns)
+    header = " & ".join(
+        " ".join(swap_symbolic_calcs(deque([name]), {}, **config_options))
+        for name in columns
+    )
+    lines = [f"\\begin{{array}}{{{alignment}}}", f"{header} \\\\ \\hline"]
+    for idx in rows:
+        if idx is None:
+            lines.append(" & ".join(["\\vdots"] * len(columns)) + " \\\\")
+        else:
+            lines.append(
+                " & ".join(render_value(values[name][idx]) for name in columns)
+                + " \\\\"
+            )
+    lines.append("\\end{array}")
+    return "\n".join(lines)
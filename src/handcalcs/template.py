@@ -0,0 +1,382 @@
+"""
+Render templates for repeated renders of the same cell source.
+
+Between calls of a @handcalc function only the values change: the
+categorization, the symbolic latex and the structure of every line stay the
+same. A RenderTemplate is the latex of the whole cell rendered once with a
+placeholder in place of each int or float value; later renders only format
+the new values and splice them in.
+
+Templates are only used where splicing gives exactly what a full render
+would:
+
+    * cells without conditional lines (the branch taken depends on the
+      values);
+    * values that are exact ints or floats; all other values that the cell
+      refers to are part of the template's key (by their fingerprints);
+    * placeholders that end up as whole items of the rendered lines.
+
+Whether a calculation is long enough to be split over several lines also
+depends on the values, so it is checked again with the new values and a
+template keeps one layout of the cell for each combination of line breaks
+seen so far. Each new layout is checked against a full render before it is
+cached.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+import re
+from typing import Mapping, Optional
+
+from handcalcs import global_config
+from handcalcs.caching import LRUCache
+from handcalcs.fingerprint import fingerprint
+from handcalcs.handcalcs import (
+    CalcCell,
+    CalcLine,
+    ConditionalLine,
+    LongCalcCell,
+    LongCalcLine,
+    ParameterLine,
+    categorize_lines,
+    categorize_raw_cell,
+    conditional_chain,
+    convert_cell,
+    format_cell,
+    latex,
+    convert_calc_line_to_long,
+    latex_repr,
+    render_latex_str,
+    swap_dec_sep,
+    test_for_long_lines,
+    toggle_scientific_notation,
+)
+
+NAME_RE = re.compile(r"[A-Za-z_]\w*")
+SLOT_TYPES = (int, float)
+FIRST_SLOT = 0xE000  # Slot tokens are single characters of the Private Use Area
+MAX_SLOTS = 0xF8FF - FIRST_SLOT
+
+_template_cache = LRUCache("template", "template_cache_size")
+_NOT_TEMPLATABLE = object()  # Cached for keys whose renders cannot use a template
+
+
+class Slot:
+    """
+    A placeholder for a value in a cell. It renders as a one-character
+    token that RenderTemplate.fill() replaces with the latex of the value.
+    Since no value renders shorter than its token, a line that is long with
+    the tokens in it is long with any values in it.
+    """
+
+    def __init__(self, index: int):
+        self.token = chr(FIRST_SLOT + index)
+
+    def __repr__(self):
+        return self.token
+
+    def __str__(self):
+        return self.token
+
+    def __format__(self, format_spec: str) -> str:
+        return self.token
+
+
+@dataclass
+class RenderTemplate:
+    """
+    The latex of a cell with tokens in place of the values of 'slots'.
+
+    'long_lines' holds the rendered items of each calculation line whose
+    line break depends on its values, with the index of the slot in place
+    of each token. 'layouts' maps which of these lines are long, as a tuple
+    of bools, to the latex of the cell with those lines broken.
+    """
+
+    slots: tuple
+    long_lines: tuple
+    layouts: dict
+    precision: int
+    use_scientific_notation: bool
+    preferred_formatter: str
+    decimal_separator: str
+
+    def render_values(self, values: Mapping) -> Optional[list]:
+        """
+        Returns a list of the latex of the value of each slot in 'values',
+        or None if any of them cannot be spliced into the template.
+        """
+        rendered_values = []
+        for name in self.slots:
+            value_latex = latex_repr(
+                values[name],
+                self.use_scientific_notation,
+                self.precision,
+                self.preferred_formatter,
+            )
+            value_latex = swap_dec_sep(deque([value_latex]), self.decimal_separator)[0]
+            if "=" in value_latex:  # Would shift the alignment points of the line
+                return None
+            rendered_values.append(value_latex)
+        return rendered_values
+
+    def get_layout(self, rendered_values: list) -> tuple:
+        """
+        Returns a tuple of whether each of the long_lines is long with the
+        values of 'rendered_values' in it.
+        """
+        layout = []
+        for items in self.long_lines:
+            line = CalcLine(
+                line=deque(
+                    rendered_values[item] if type(item) is int else item
+                    for item in items
+                ),
+                comment="",
+                latex="",
+            )
+            layout.append(test_for_long_lines(line))
+        return tuple(layout)
+
+    def fill(self, values: Mapping) -> Optional[str]:
+        """
+        Returns the latex of the cell with the values of the slots taken
+        from 'values', or None if the template does not apply to them.
+        """
+        rendered_values = self.render_values(values)
+        if rendered_values is None:
+            return None
+        latex_code = self.layouts.get(self.get_layout(rendered_values))
+        if latex_code is None:
+            return None
+        return latex_code.translate(
+            {FIRST_SLOT + idx: value for idx, value in enumerate(rendered_values)}
+        )
+
+
+def compile_template(
+    cell_source: str,
+    calculated_results: Mapping,
+    slots: tuple,
+    line_args: dict,
+    config_options: dict,
+) -> Optional[RenderTemplate]:
+    """
+    Returns a RenderTemplate of 'cell_source' with the values of the names
+    in 'slots' left out and with the layout of the values in
+    'calculated_results', or None if the cell cannot be rendered from a
+    template.
+    """
+    if len(slots) > MAX_SLOTS:
+        return None
+    template_results = dict(calculated_results)
+    for idx, name in enumerate(slots):
+        template_results[name] = Slot(idx)
+    cell = categorize_raw_cell(
+        cell_source,
+        template_results,
+        line_args["override"],
+        line_args["precision"],
+        line_args["sci_not"],
+    )
+    cell = categorize_lines(cell)
+    if any(isinstance(line, ConditionalLine) for line in cell.lines):
+        return None
+    with conditional_chain():
+        cell = convert_cell(cell, **config_options)
+
+    if cell.precision is None:
+        precision = config_options["display_precision"]
+    else:
+        precision = cell.precision
+    # The notation is toggled by format_cell() and then again by
+    # round_and_render_line_objects_to_latex()
+    cell_notation = toggle_scientific_notation(
+        config_options["use_scientific_notation"], cell.scientific_notation
+    )
+    template = RenderTemplate(
+        slots=slots,
+        long_lines=(),
+        layouts={},
+        precision=precision,
+        use_scientific_notation=toggle_scientific_notation(
+            config_options["use_scientific_notation"], cell_notation
+        ),
+        preferred_formatter=config_options["preferred_string_formatter"],
+        decimal_separator=config_options["decimal_separator"],
+    )
+    rendered_values = template.render_values(calculated_results)
+    if rendered_values is None:
+        return None
+
+    # Break the lines that are long with these values in them, as
+    # format_cell() would have; it keeps the others short since the tokens
+    # are no longer than the values.
+    long_lines = []
+    if isinstance(cell, (CalcCell, LongCalcCell)):
+        for idx, line in enumerate(cell.lines):
+            if type(line) is not CalcLine:
+                continue
+            items = render_latex_str(
+                line.line,
+                template.use_scientific_notation,
+                template.precision,
+                template.preferred_formatter,
+            )
+            items = swap_dec_sep(items, template.decimal_separator)
+            if not any(is_slot_token(item) for item in items):
+                continue
+            long_lines.append(
+                tuple(
+                    ord(item) - FIRST_SLOT if is_slot_token(item) else item
+                    for item in items
+                )
+            )
+            filled_line = CalcLine(
+                line=deque(
+                    (
+                        rendered_values[ord(item) - FIRST_SLOT]
+                        if is_slot_token(item)
+                        else item
+                    )
+                    for item in items
+                ),
+                comment="",
+                latex="",
+            )
+            if test_for_long_lines(filled_line):
+                cell.lines[idx] = convert_calc_line_to_long(line)
+    template.long_lines = tuple(long_lines)
+
+    cell = format_cell(cell, **config_options)
+    for line in cell.lines:
+        items = line.line if isinstance(line.line, deque) else ()
+        slot_items = [item for item in items if has_slot_token(item)]
+        if not slot_items:
+            continue
+        if not all(is_slot_token(item) for item in slot_items):
+            return None  # A value was rendered as part of a larger item
+        if isinstance(line, ParameterLine) and not any("=" in item for item in items):
+            return None  # Spaces in the values would be formatted
+    template.layouts[template.get_layout(rendered_values)] = cell.latex_code
+    return template
+
+
+def is_slot_token(item: str) -> bool:
+    """
+    Returns True if 'item' is the token of a Slot.
+    """
+    return len(item) == 1 and FIRST_SLOT <= ord(item) <= FIRST_SLOT + MAX_SLOTS
+
+
+def has_slot_token(item: str) -> bool:
+    """
+    Returns True if 'item' contains the token of a Slot.
+    """
+    return any(FIRST_SLOT <= ord(char) <= FIRST_SLOT + MAX_SLOTS for char in item)
+
+
+def get_cell_values(cell_source: str, calculated_results: Mapping) -> dict:
+    """
+    Returns a dict of the values in 'calculated_results' of the names that
+    'cell_source' refers to.
+    """
+    return {
+        name: calculated_results[name]
+        for name in set(NAME_RE.findall(cell_source))
+        if name in calculated_results
+    }
+
+
+def get_template_key(
+    cell_source: str, calculated_results: Mapping, line_args: dict, config_options: dict
+) -> Optional[tuple]:
+    """
+    Returns a tuple of the key of the template of 'cell_source' and the
+    names of its slots, or None if the cell refers to a value that cannot
+    be fingerprinted.
+
+    The key holds the source, 'line_args', the config options, the types of
+    the slot values and the fingerprints of all other values that the cell
+    refers to.
+    """
+    slots = []
+    values = []
+    for name in sorted(set(NAME_RE.findall(cell_source))):
+        if name not in calculated_results:
+            continue
+        value = calculated_results[name]
+        if type(value) in SLOT_TYPES:
+            slots.append(name)
+            values.append((name, type(value)))
+            continue
+        value_fingerprint = fingerprint(value)
+        if value_fingerprint is None:
+            return None
+        values.append((name, value_fingerprint))
+    key = (
+        cell_source,
+        line_args["override"],
+        line_args["precision"],
+        line_args["sci_not"],
+        tuple(values),
+        repr(sorted(config_options.items())),
+    )
+    return key, tuple(slots)
+
+
+def render(
+    cell_source: str,
+    calculated_results: Mapping,
+    line_args: dict,
+    config_options: Optional[dict] = None,
+) -> str:
+    """
+    Returns the latex of 'cell_source' with 'calculated_results', as
+    LatexRenderer.render() does, from a cached RenderTemplate where one
+    applies.
+    """
+    if config_options is None:
+        config_options = global_config._config
+
+    def render_in_full():
+        return latex(
+            raw_python_source=cell_source,
+            calculated_results=calculated_results,
+            override_commands=line_args["override"],
+            config_options=config_options,
+            cell_precision=line_args["precision"],
+            cell_notation=line_args["sci_not"],
+        )
+
+    if _template_cache.maxsize <= 0:
+        return render_in_full()
+    key_and_slots = get_template_key(
+        cell_source, calculated_results, line_args, config_options
+    )
+    if key_and_slots is None:
+        return render_in_full()
+    key, slots = key_and_slots
+    template = _template_cache.get(key)
+    if template is _NOT_TEMPLATABLE:
+        return render_in_full()
+    if template is not None:
+        latex_code = template.fill(calculated_results)
+        if latex_code is not None:
+            return latex_code
+
+    latex_code = render_in_full()
+    try:
+        new_template = compile_template(
+            cell_source, calculated_results, slots, line_args, config_options
+        )
+    except Exception:  # A line needed a value that a Slot cannot stand in for
+        new_template = None
+    if new_template is None or new_template.fill(calculated_results) != latex_code:
+        if template is None:
+            _template_cache.put(key, _NOT_TEMPLATABLE)
+    elif template is None:
+        _template_cache.put(key, new_template)
+    else:  # The same template with the layout of these values added
+        template.layouts.update(new_template.layouts)
+    return latex_code
@@ -3,6 +3,8 @@
 from report.renderer import ReportRenderer
 from report.types import ReportCalcCell, ReportCalcLine, test_for_report_line
 from report.formatters import latex_report
+from report.batch import render_many
+from report.dependencies import DependencyGraph
 
 __all__ = [
     'ReportRenderer',
@@ -10,4 +12,6 @@ __all__ = [
     'ReportCalcLine',
     'test_for_report_line',
     'latex_report',
+    'render_many',
+    'DependencyGraph',
 ]
\ No newline at end of file
@@ -0,0 +1,168 @@
+"""Rendering of many report cells at once with a process pool."""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+import pickle
+import re
+import sys
+from typing import Any, Optional, Sequence
+
+from handcalcs import global_config
+from handcalcs.handcalcs import latex_repr, toggle_scientific_notation
+from report.formatters import latex_report
+
+NAME_RE = re.compile(r"[A-Za-z_]\w*")
+
+_PICKLABLE_TYPES = {int, float, complex, bool, str, bytes, type(None)}
+
+
+class PrerenderedValue:
+    """
+    The latex of a value that cannot be pickled, rendered before it is sent
+    to a worker. latex_repr() renders it through _repr_latex_(), as it
+    would any value with its own latex, so it is not set in \\textrm like
+    a str value would be.
+    """
+
+    def __init__(self, latex: str):
+        self.latex = latex
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.latex!r})"
+
+    def _repr_latex_(self):
+        return self.latex
+
+
+def render_many(
+    cells: Sequence[str],
+    namespace_snapshots: Sequence[dict],
+    workers: Optional[int] = None,
+    override_commands: str = "report",
+    cell_precision: Optional[int] = None,
+    cell_notation: Optional[bool] = None,
+    config_options: Optional[dict] = None,
+) -> list:
+    """
+    Returns a list of the rendered Markdown + LaTeX of each cell source in
+    'cells', in the same order, as latex_report() would render it.
+
+    'namespace_snapshots' holds the calculated results of each cell (e.g. a
+    copy of the notebook namespace taken after the cell ran), one per cell.
+
+    The cells are rendered in a pool of 'workers' processes (default: one
+    per CPU). Only the names that appear in a cell are sent with it. Values
+    that cannot be pickled are rendered to their latex_repr() before they
+    are sent (see PrerenderedValue), so they appear in the output as they
+    would in the current process but cannot be compared in a conditional
+    line. With 'workers' set to 1, or a single cell, the cells
+    are rendered in the current process.
+
+    'config_options' defaults to a copy of the current global config so that
+    the workers render with any options set with handcalcs.set_option().
+    """
+    if len(cells) != len(namespace_snapshots):
+        raise ValueError(
+            f"Each cell needs a namespace snapshot: got {len(cells)} cells"
+            f" and {len(namespace_snapshots)} snapshots."
+        )
+    if config_options is None:
+        config_options = dict(global_config._config)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(cells))
+
+    if workers <= 1:
+        return [
+            latex_report(
+                source,
+                results,
+                override_commands,
+                config_options,
+                cell_precision,
+                cell_notation,
+            )
+            for source, results in zip(cells, namespace_snapshots)
+        ]
+
+    jobs = [
+        (
+            source,
+            prepare_namespace(
+                source, results, cell_precision, cell_notation, **config_options
+            ),
+            override_commands,
+            config_options,
+            cell_precision,
+            cell_notation,
+        )
+        for source, results in zip(cells, namespace_snapshots)
+    ]
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_render_job, jobs, chunksize=chunksize))
+
+
+def _render_job(job: tuple) -> str:
+    return latex_report(*job)
+
+
+def prepare_namespace(
+    source: str,
+    results: dict,
+    cell_precision: Optional[int],
+    cell_notation: Optional[bool],
+    **config_options,
+) -> dict:
+    """
+    Returns a dict of the items of 'results' whose names appear in 'source',
+    with any value that cannot be pickled replaced by a PrerenderedValue of
+    its latex_repr().
+    """
+    names = set(NAME_RE.findall(source))
+    namespace = {}
+    for name, value in results.items():
+        if name not in names:
+            continue
+        if not _is_picklable(value):
+            value = PrerenderedValue(
+                _preformat_value(value, cell_precision, cell_notation, **config_options)
+            )
+        namespace[name] = value
+    return namespace
+
+
+def _is_picklable(value: Any) -> bool:
+    if type(value) in _PICKLABLE_TYPES:
+        return True
+    np = sys.modules.get("numpy")
+    if np is not None and type(value) is np.ndarray and not value.dtype.hasobject:
+        return True
+    try:
+        pickle.dumps(value)
+    except Exception:
+        return False
+    return True
+
+
+def _preformat_value(
+    value: Any,
+    cell_precision: Optional[int],
+    cell_notation: Optional[bool],
+    **config_options,
+) -> str:
+    """
+    Returns 'value' rendered as it would be in the cell by latex_repr().
+    """
+    precision = cell_precision
+    if precision is None:
+        precision = config_options["display_precision"]
+    use_scientific_notation = toggle_scientific_notation(
+        config_options["use_scientific_notation"], cell_notation
+    )
+    return latex_repr(
+        value,
+        use_scientific_notation,
+        precision,
+        config_options["preferred_string_formatter"],
+    )
@@ -3,6 +3,7 @@
 from collections import deque
 from typing import Union
 
+from handcalcs import profiling
 from handcalcs.handcalcs import (
     CalcCell,
     ParameterCell,
@@ -10,23 +11,17 @@ from handcalcs.handcalcs import (
     ParameterLine,
     ConditionalLine,
     BlankLine,
-    test_for_blank_line,
-    test_for_conditional_line,
+    classify_line,
     create_conditional_line,
-    test_for_parameter_line,
     split_parameter_line,
-    test_for_numeric_line,
-    expr_parser,
     NumericCalcLine,
     add_result_values_to_line,
 )
 
-from report.types import (
-    ReportCalcLine, test_for_report_line,
-    InputCalcLine, test_for_input_line, split_input_line,
-    )
+from report.types import ReportCalcLine, InputCalcLine
 
 
+@profiling.timed("stage")
 def categorize_lines(
     cell: Union[CalcCell, ParameterCell], cell_override: str = ""
 ) -> Union[CalcCell, ParameterCell]:
@@ -61,105 +56,40 @@ def categorize_line(
     The 'cell_override' parameter allows cell-level behavior to override
     default line categorization logic.
     """
-    # Handle blank lines and comments
-    if test_for_blank_line(line):
-        return BlankLine(line, "", "")
-
-    if test_for_report_line(line):
-        return ReportCalcLine(line, "", "")
-
-    if line.startswith("#"):
-        return BlankLine(line, "", "")
-
-    if line.endswith("ignore"):
-        return BlankLine(line, "", "")
-
-    # Split off inline comments
-    try:
-        line, comment = line.split("#", 1)
-    except ValueError:
-        comment = ""
-
     # Report cell override behavior
     if cell_override == "input":
-        return _categorize_input_line(line, calculated_results, comment)
-    if cell_override == "report":
-        return _categorize_report_line(line, calculated_results, comment)
-    
-    # Standard behavior (for future extension)
-    return _categorize_standard_line(line, calculated_results, comment)
-
-
-def _categorize_input_line(
-    line: str, calculated_results: dict, comment: str
-) -> Union[ConditionalLine, InputCalcLine]:
-    """Categorize a line within a report cell."""
-    if test_for_conditional_line(line):
-        return create_conditional_line(
-            line, calculated_results, "input", comment
-        )
-    return InputCalcLine(
-        split_parameter_line(line, calculated_results), comment, "")
-
-def _categorize_report_line(
-    line: str, calculated_results: dict, comment: str
-) -> Union[LongCalcLine, ParameterLine, ConditionalLine, ReportCalcLine]:
-    """Categorize a line within a report cell."""
-    if test_for_parameter_line(line):  # A parameter can exist in a long cell, too
-        categorized_line = ParameterLine(
-            split_parameter_line(line, calculated_results), comment, ""
-        )
-    elif test_for_conditional_line(
-        line
-    ):  # A conditional line can exist in a long cell, too
-        categorized_line = create_conditional_line(
-            line, calculated_results, "report", comment
-        )
-    elif test_for_numeric_line(
-        deque(
-            list(expr_parser(line))[1:]
-        )  # Leave off the declared variable, e.g. _x_ = ...
-    ):
-        categorized_line = NumericCalcLine(expr_parser(line), comment, "")
-
+        scan = classify_line(line, "parameter")
+    elif cell_override == "report":
+        scan = classify_line(line, "long")  # A report cell reads like a long cell
     else:
-        categorized_line = LongCalcLine(
-            expr_parser(line), comment, ""
-        )  # code_reader
-    return categorized_line
+        cell_override = ""  # Standard behavior (for future extension)
+        scan = classify_line(line)
 
-def _categorize_standard_line(
-    line: str, calculated_results: dict, comment: str
-) -> Union[LongCalcLine, ParameterLine, ConditionalLine]:
-    """Categorize a line using standard behavior."""
-    if line == "\n" or line == "":
+    if scan.kind == "blank":
         return BlankLine(line, "", "")
-
-    if test_for_parameter_line(line):
+    if scan.kind == "intertext":
+        return ReportCalcLine(line, "", "")
+    if scan.kind == "parameter" and cell_override == "input":
+        return InputCalcLine(
+            split_parameter_line(scan.code, calculated_results), scan.comment, ""
+        )
+    if scan.kind == "parameter":
         return ParameterLine(
-            split_parameter_line(line, calculated_results), comment, ""
+            split_parameter_line(scan.code, calculated_results), scan.comment, ""
         )
-
-    if test_for_conditional_line(line):
+    if scan.kind == "conditional":
         return create_conditional_line(
-            line, calculated_results, "", comment
-        )
-
-    if test_for_numeric_line(deque(list(expr_parser(line))[1:])):
-        return NumericCalcLine(expr_parser(line), comment, "")
-
-    if "=" in line:
-        return LongCalcLine(expr_parser(line), comment, "")
-
-    if len(expr_parser(line)) == 1:
-        return ParameterLine(
-            split_parameter_line(line, calculated_results), comment, ""
+            scan.code, calculated_results, cell_override, scan.comment
         )
+    if scan.kind == "numeric":
+        return NumericCalcLine(scan.tokens, scan.comment, "")
+    if scan.kind in ("long", "calc"):
+        return LongCalcLine(scan.tokens, scan.comment, "")  # code_reader
 
     raise ValueError(
-        f"Line: {line} is not recognized for rendering.\n"
+        f"Line: {scan.code} is not recognized for rendering.\n"
         "Lines must either:\n"
         "\t * Be the name of a previously assigned single variable\n"
         "\t * Be an arithmetic variable assignment (i.e. calculation that uses '=' in the line)\n"
         "\t * Be a conditional arithmetic assignment (i.e. uses 'if', 'elif', or 'else', each on a single line)"
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,293 @@
+"""Variable-level dependency graph across the cells of a notebook."""
+
+import ast
+from dataclasses import dataclass
+from typing import Hashable, Iterable, Optional
+
+
+@dataclass
+class CellNode:
+    """The names that a cell assigns and the names that it reads."""
+
+    cell_id: Hashable
+    assigned: frozenset
+    referenced: frozenset
+
+
+def get_cell_names(source: str) -> tuple:
+    """
+    Returns a tuple of the frozensets of names assigned and names read by
+    the cell 'source'. A name that the cell reads before (or without) ever
+    assigning it must come from an earlier cell; names that are read only
+    after the cell assigned them are not counted as read. An augmented
+    assignment (e.g. "x += 1") both reads and assigns its target. Names
+    bound only inside functions, lambdas, classes and comprehensions are
+    not assigned by the cell (see ScopeNames).
+
+    IPython magic and shell lines (e.g. "%%render input") are ignored.
+    Raises SyntaxError if the rest of 'source' is not valid Python.
+    """
+    python_lines = [
+        "" if line.lstrip().startswith(("%", "!")) else line
+        for line in source.split("\n")
+    ]
+    tree = ast.parse("\n".join(python_lines))
+    assigned = set()
+    referenced = set()
+    for statement in tree.body:
+        names = ScopeNames()
+        names.visit(statement)
+        referenced |= names.loads - assigned
+        assigned |= names.stores | names.global_stores
+    return frozenset(assigned), frozenset(referenced)
+
+
+class ScopeNames(ast.NodeVisitor):
+    """
+    Collects the names that the code of one scope binds (.stores) and reads
+    (.loads). Functions, lambdas, classes and comprehensions are scopes of
+    their own: the names bound in them (including parameters) stay local,
+    while the names they read without binding are read by this scope.
+    Names that they assign with a "global" statement are in .global_stores.
+    """
+
+    def __init__(self, comprehension: bool = False):
+        self.loads = set()
+        self.stores = set()
+        self.global_stores = set()
+        self.declared = set()  # Names declared global or nonlocal
+        self.comprehension = comprehension
+        self.escaping = set()  # Names bound by := in a comprehension
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Load):
+            self.loads.add(node.id)
+        else:
+            self.stores.add(node.id)
+
+    def visit_AugAssign(self, node: ast.AugAssign) -> None:
+        if isinstance(node.target, ast.Name):
+            self.loads.add(node.target.id)  # x += 1 reads x as well
+        self.generic_visit(node)
+
+    def visit_NamedExpr(self, node: ast.NamedExpr) -> None:
+        if self.comprehension:  # Binds in the enclosing scope
+            self.escaping.add(node.target.id)
+        else:
+            self.stores.add(node.target.id)
+        self.visit(node.value)
+
+    def visit_Global(self, node: ast.Global) -> None:
+        self.declared.update(node.names)
+
+    visit_Nonlocal = visit_Global
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self.stores.add((alias.asname or alias.name).split(".")[0])
+
+    visit_ImportFrom = visit_Import
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler) -> None:
+        if node.name:
+            self.stores.add(node.name)
+        self.generic_visit(node)
+
+    def visit_MatchAs(self, node: ast.AST) -> None:
+        if node.name:
+            self.stores.add(node.name)
+        self.generic_visit(node)
+
+    visit_MatchStar = visit_MatchAs
+
+    def visit_MatchMapping(self, node: ast.MatchMapping) -> None:
+        if node.rest:
+            self.stores.add(node.rest)
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node: ast.AST) -> None:
+        self.stores.add(node.name)
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        self.visit_signature(node.args)
+        if node.returns is not None:
+            self.visit(node.returns)
+        self.visit_scope(node.body, get_parameter_names(node.args))
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node: ast.Lambda) -> None:
+        self.visit_signature(node.args)
+        self.visit_scope([node.body], get_parameter_names(node.args))
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self.stores.add(node.name)
+        for item in node.decorator_list + node.bases + node.keywords:
+            self.visit(item)
+        self.visit_scope(node.body, set())
+
+    def visit_comprehension_scope(self, node: ast.AST) -> None:
+        generators = node.generators
+        self.visit(generators[0].iter)  # Evaluated in the enclosing scope
+        inner = ScopeNames(comprehension=True)
+        for idx, generator in enumerate(generators):
+            inner.visit(generator.target)
+            if idx:
+                inner.visit(generator.iter)
+            for condition in generator.ifs:
+                inner.visit(condition)
+        if isinstance(node, ast.DictComp):
+            inner.visit(node.key)
+            inner.visit(node.value)
+        else:
+            inner.visit(node.elt)
+        self.add_inner_scope(inner, set())
+        if self.comprehension:
+            self.escaping |= inner.escaping
+        else:
+            self.stores |= inner.escaping
+
+    visit_ListComp = visit_comprehension_scope
+    visit_SetComp = visit_comprehension_scope
+    visit_DictComp = visit_comprehension_scope
+    visit_GeneratorExp = visit_comprehension_scope
+
+    def visit_signature(self, arguments: ast.arguments) -> None:
+        """
+        Visits the parts of a signature that are evaluated in this scope:
+        the default values and the annotations.
+        """
+        for default in arguments.defaults + arguments.kw_defaults:
+            if default is not None:
+                self.visit(default)
+        for arg in get_parameters(arguments):
+            if arg.annotation is not None:
+                self.visit(arg.annotation)
+
+    def visit_scope(self, body: list, parameters: set) -> None:
+        inner = ScopeNames()
+        for statement in body:
+            inner.visit(statement)
+        self.add_inner_scope(inner, parameters)
+
+    def add_inner_scope(self, inner: "ScopeNames", parameters: set) -> None:
+        local = (inner.stores | parameters) - inner.declared
+        self.loads |= inner.loads - local
+        self.global_stores |= inner.global_stores | (inner.stores & inner.declared)
+
+
+def get_parameters(arguments: ast.arguments) -> list:
+    """
+    Returns a list of the ast.arg of every parameter in 'arguments'.
+    """
+    parameters = arguments.posonlyargs + arguments.args + arguments.kwonlyargs
+    for arg in (arguments.vararg, arguments.kwarg):
+        if arg is not None:
+            parameters.append(arg)
+    return parameters
+
+
+def get_parameter_names(arguments: ast.arguments) -> set:
+    """
+    Returns a set of the names of the parameters in 'arguments'.
+    """
+    return {arg.arg for arg in get_parameters(arguments)}
+
+
+class DependencyGraph:
+    """
+    The dataflow between the cells of a notebook, in notebook order.
+
+    Each cell depends on the cells that last assigned the names it reads,
+    e.g. a "%%render" cell that uses 'L' depends on the "%%render input"
+    cell that sets 'L'. downstream() returns the cells to re-run, in an
+    order that respects these dependencies, when some cells or names
+    change.
+    """
+
+    def __init__(self):
+        self._nodes = {}  # {cell_id: CellNode}, in notebook order
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self._nodes)} cells)"
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, cell_id: Hashable) -> bool:
+        return cell_id in self._nodes
+
+    @classmethod
+    def from_cells(cls, cells: Iterable[tuple]) -> "DependencyGraph":
+        """
+        Returns a new DependencyGraph of the (cell_id, source) pairs in
+        'cells', in notebook order.
+        """
+        graph = cls()
+        for cell_id, source in cells:
+            graph.set_cell(cell_id, source)
+        return graph
+
+    def set_cell(self, cell_id: Hashable, source: str) -> CellNode:
+        """
+        Returns the CellNode of 'cell_id' after adding it with 'source'. A
+        new cell is added at the end of the notebook; an existing cell keeps
+        its position and only has its names updated.
+        """
+        assigned, referenced = get_cell_names(source)
+        node = CellNode(cell_id, assigned, referenced)
+        self._nodes[cell_id] = node
+        return node
+
+    def remove_cell(self, cell_id: Hashable) -> None:
+        """
+        Returns None. Removes 'cell_id' from the graph.
+        """
+        del self._nodes[cell_id]
+
+    def dependencies(self, cell_id: Hashable) -> list:
+        """
+        Returns a list of the ids of the cells that 'cell_id' directly reads
+        names from, in notebook order.
+        """
+        providers = {}
+        for node in self._nodes.values():
+            if node.cell_id == cell_id:
+                break
+            for name in node.assigned:
+                providers[name] = node.cell_id
+        node = self._nodes[cell_id]
+        used = {providers[name] for name in node.referenced if name in providers}
+        return [other for other in self._nodes if other in used]
+
+    def downstream(
+        self,
+        changed_cells: Iterable[Hashable] = (),
+        changed_names: Optional[Iterable[str]] = None,
+    ) -> list:
+        """
+        Returns a list of the ids of the cells that have to be re-run, in
+        notebook order (which is a topological order of the graph), after
+        the cells in 'changed_cells' were edited or the names in
+        'changed_names' were changed before the first cell (e.g. in a
+        setup script).
+
+        The changed cells are included themselves. Any other cell is
+        included if it reads a name whose value it sees is stale: one of
+        'changed_names', or a name assigned by an included cell, that no
+        cell in between assigns again.
+        """
+        changed_cells = set(changed_cells)
+        unknown = changed_cells - self._nodes.keys()
+        if unknown:
+            raise KeyError(f"Cells not in the graph: {sorted(map(str, unknown))}")
+        stale_names = set(changed_names or ())
+        rerun = []
+        for node in self._nodes.values():
+            if node.cell_id in changed_cells or node.referenced & stale_names:
+                rerun.append(node.cell_id)
+                stale_names |= node.assigned
+            else:
+                # Names re-assigned by an up-to-date cell are fresh again
+                stale_names -= node.assigned
+        return rerun
@@ -3,20 +3,25 @@
 import re
 from typing import Optional
 
+from handcalcs.caching import LRUCache
+from handcalcs.fingerprint import fingerprint_names
 from handcalcs.handcalcs import (
     format_cell,
     format_lines,
     toggle_scientific_notation,
     round_and_render_line_objects_to_latex,
     convert_applicable_long_lines,
-    format_strings, itertools, BlankLine, deque
+    format_strings, itertools, BlankLine, deque,
+    conditional_chain,
+    add_result_values_to_line,
+    test_for_conditional_line,
 )
 
 from report.types import (
     InputCalcCell, InputCalcLine,
     ReportCalcCell, ReportCalcLine,
     )
-from report.categorizer import categorize_lines
+from report.categorizer import categorize_lines, categorize_line
 from report.converters import create_report_cell, create_input_cell, convert_cell
 
 @format_lines.register(InputCalcLine)
@@ -100,46 +105,118 @@ def format_reportcalc_cell(cell: ReportCalcCell, **config_options) -> ReportCalc
         cell.scientific_notation,
     )
 
-    blocks: list[str] = []
-    pending_math: list[str] = []
+    blocks = (
+        format_reportcalc_block(line, precision, cell_notation, **config_options)
+        for line in cell.lines
+    )
+    cell.markdown = "\n\n".join(block for block in blocks if block)
+    return cell
 
-    def flush_math():
-        if not pending_math:
-            return
-        blocks.append(
-              "$$\n"
-              "\\hspace{2em}"
-            + "\\begin{aligned}\n"
-            + "\n".join(pending_math)
-            + "\\end{aligned}\n"
-            + "$$"
-        )
-        pending_math.clear()
 
-    for line in cell.lines:
-        line = round_and_render_line_objects_to_latex(
-            line, precision, cell_notation, **config_options
-        )
-        line = convert_applicable_long_lines(line)
-        line = format_lines(line, **config_options)
+def format_reportcalc_block(
+    line, precision: int, cell_notation: bool, **config_options
+) -> str:
+    """
+    Returns the Markdown block of a converted line of a report cell: the
+    text of a ReportCalcLine, or the latex of any other line as a display
+    math block. Returns "" for lines that render to nothing.
+    """
+    line = round_and_render_line_objects_to_latex(
+        line, precision, cell_notation, **config_options
+    )
+    line = convert_applicable_long_lines(line)
+    line = format_lines(line, **config_options)
 
-        if not line.latex:
-            continue
+    if not line.latex:
+        return ""
+    if isinstance(line, ReportCalcLine):
+        return line.latex
+    return (
+          "$$\n"
+          "\\hspace{2em}"
+        + "\\begin{aligned}\n"
+        + line.latex
+        + "\\end{aligned}\n"
+        + "$$"
+    )
 
-        if isinstance(line, ReportCalcLine):
-            # Text always breaks math
-            flush_math()
-            blocks.append(line.latex)
-            continue
 
-        flush_math()
-        pending_math.append(line.latex)
+_report_line_cache = LRUCache("report_line", "report_line_cache_size")
+_MISSING = object()
+NAME_RE = re.compile(r"[A-Za-z_]\w*")
 
-    flush_math()
-    cell.markdown = "\n\n".join(blocks)
+
+def render_report_lines(cell: ReportCalcCell, **config_options) -> ReportCalcCell:
+    """
+    Returns 'cell' with its markdown rendered line by line, re-using the
+    Markdown blocks of lines that were rendered before with the same source,
+    the same values of the names they reference and the same options.
+
+    Only the lines that miss the cache are categorized, converted and
+    formatted; the blocks are then stitched together in order, exactly as
+    format_reportcalc_cell() joins them. Conditional lines are always
+    rendered since their output depends on the lines before them.
+    """
+    precision = (
+        config_options["display_precision"]
+        if cell.precision is None
+        else cell.precision
+    )
+    cell_notation = toggle_scientific_notation(
+        config_options["use_scientific_notation"],
+        cell.scientific_notation,
+    )
+    calculated_results = cell.calculated_results
+    options_key = (precision, cell_notation, repr(sorted(config_options.items())))
+
+    source_lines = cell.source.rstrip().split("\n")
+    keys = []
+    blocks = []
+    misses = deque([])
+    for idx, source_line in enumerate(source_lines):
+        key = get_report_line_key(source_line, calculated_results, options_key)
+        block = _MISSING if key is None else _report_line_cache.get(key, _MISSING)
+        if block is _MISSING:
+            categorized = categorize_line(source_line, calculated_results, "report")
+            misses.append(
+                (idx, add_result_values_to_line(categorized, calculated_results))
+            )
+        keys.append(key)
+        blocks.append(block)
+
+    cell.lines = deque(line for _, line in misses)
+    with conditional_chain():
+        cell = convert_cell(cell, **config_options)
+    for (idx, _), line in zip(misses, cell.lines):
+        block = format_reportcalc_block(
+            line, precision, cell_notation, **config_options
+        )
+        if keys[idx] is not None:
+            _report_line_cache.put(keys[idx], block)
+        blocks[idx] = block
+
+    cell.markdown = "\n\n".join(block for block in blocks if block)
     return cell
 
 
+def get_report_line_key(
+    source_line: str, calculated_results: dict, options_key: tuple
+) -> Optional[tuple]:
+    """
+    Returns a hashable key for the rendered block of 'source_line', made of
+    its source, the fingerprints of the values of the names that it
+    references and 'options_key'. Returns None if the line cannot be cached:
+    conditional lines and lines that reference values which cannot be
+    fingerprinted.
+    """
+    if test_for_conditional_line(source_line):
+        return None
+    values = fingerprint_names(NAME_RE.findall(source_line), calculated_results)
+    if values is None:
+        return None
+    return (source_line, values, options_key)
+
+
 def latex_report(
     raw_python_source: str,
     calculated_results: dict,
@@ -168,11 +245,16 @@ def latex_report(
             cell_precision=cell_precision,
             cell_notation=cell_notation,
         )
+    # Report cells are rendered line by line, re-using unchanged lines
+    if override_commands == "report":
+        return render_report_lines(cell, **config_options).markdown
+
     # Categorize lines
     cell = categorize_lines(cell, override_commands)
 
     # Convert cell
-    cell = convert_cell(cell, **config_options)
+    with conditional_chain():
+        cell = convert_cell(cell, **config_options)
 
     # Format cell
     cell = format_cell(cell, **config_options)
@@ -0,0 +1,17 @@
+import pytest
+
+from handcalcs import clear_caches, global_config
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    """
+    Runs each test with empty render caches and restores any options that
+    it set.
+    """
+    config = dict(global_config._config)
+    clear_caches()
+    yield
+    global_config._config.clear()
+    global_config._config.update(config)
+    clear_caches()
@@ -0,0 +1,55 @@
+import pytest
+
+from handcalcs import set_option
+from handcalcs.handcalcs import latex_repr
+
+np = pytest.importorskip("numpy")
+
+
+def latex_repr_per_element(item, use_scientific_notation, precision, formatter):
+    """
+    The latex of arrays before vectorized formatting: every element of the
+    (nested) sequence through latex_repr().
+    """
+    if isinstance(item, np.ndarray) and item.ndim:
+        items = [
+            latex_repr_per_element(
+                element, use_scientific_notation, precision, formatter
+            )
+            for element in item
+        ]
+        return "[" + ",\\ ".join(items) + "]"
+    return latex_repr(item, use_scientific_notation, precision, formatter)
+
+
+ARRAYS = [
+    np.array([1.0, -2.5, 0.0, -0.0, 1e-9, 12345.678]),
+    np.array([1, -2, 300], dtype=np.int64),
+    np.array([1, 2, 3], dtype=np.uint8),
+    np.array([[1.5, 2.25], [3.125, -4.0]]),
+    np.arange(24, dtype=np.float32).reshape(2, 3, 4) / 7,
+    np.array([1 + 2j, -0.5j]),
+    np.array([np.nan, np.inf, -np.inf]),
+    np.array([], dtype=float),
+]
+
+
+@pytest.mark.parametrize("array", ARRAYS, ids=lambda array: str(array.dtype))
+@pytest.mark.parametrize("use_scientific_notation", [False, True])
+@pytest.mark.parametrize("precision", [0, 3, 6])
+def test_vectorized_formatting_matches_per_element(
+    array, use_scientific_notation, precision
+):
+    expected = latex_repr_per_element(array, use_scientific_notation, precision, "")
+    assert latex_repr(array, use_scientific_notation, precision, "") == expected
+
+
+def test_large_arrays_are_summarized():
+    set_option("array_threshold", 10)
+    set_option("array_edgeitems", 2)
+    latex_code = latex_repr(np.arange(20.0), False, 1, "")
+    assert latex_code == "[0.0,\\ 1.0,\\ \\cdots,\\ 18.0,\\ 19.0]"
+    set_option("array_threshold", 0)  # Never summarized
+    assert latex_repr(np.arange(20.0), False, 1, "") == latex_repr_per_element(
+        np.arange(20.0), False, 1, ""
+    )
@@ -0,0 +1,116 @@
+import random
+
+import pytest
+
+from handcalcs import ast_parser
+from handcalcs.handcalcs import parse_expr_line, tuple_to_deque
+
+# Lines that the ast backend parses itself
+SUPPORTED_LINES = [
+    "a = b",
+    "x = 2",
+    "x = 2.5",
+    "x = 1.5e-3",
+    "x = 1E6 * y",
+    "y = a + b - c",
+    "y = a * b / c // d % e",
+    "y = a**b**c",
+    "y = (a + b) * c",
+    "y = ((a + b))",
+    "y = (a)",
+    "y = -a + +b * ~c",
+    "y = -(a + b)**2",
+    "y = sqrt(a**2 + b**2)",
+    "y = f(a, b, c)",
+    "y = f()",
+    "y = math.sin(alpha) * np.cos(beta_1)",
+    "y = f(g(a), (b + c) / 2)",
+    "z = 2+3j",
+    "z = 4j * a",
+    "a < b",
+    "a <= b == c != d",
+    "x_1 = a_1 * (b_2 - c_3) / d_4",
+    "M_Ed = w * L**2 / 8",
+    "sigma = N / A + M / W",
+]
+
+# Lines that the ast backend hands back to pyparsing
+UNSUPPORTED_LINES = [
+    "y = a[0] * b",
+    "y = a if b else c",
+    "z = a + 2-3j",
+    "c = a if_b",
+    "y = f(a, b,)",
+    "y = (a, b)",
+    "y = a and b",
+    "y = lambda x: x",
+]
+
+OPERATORS = ["+", "-", "*", "/", "//", "%", "**", "<", ">", "<=", ">=", "==", "!="]
+NAMES = ["a", "b_1", "alpha", "M_Ed", "x.y", "L"]
+NUMBERS = ["2", "0.5", "3.", "1.5e-3", "2E6", "4j", "1+2j", "3-0.5j"]
+FUNCTIONS = ["sqrt", "math.sin", "f", "np.log10"]
+
+
+def random_expression(rng: random.Random, depth: int) -> str:
+    if depth == 0 or rng.random() < 0.3:
+        return rng.choice(NAMES + NUMBERS)
+    kind = rng.random()
+    if kind < 0.45:
+        op = rng.choice(OPERATORS)
+        left = random_expression(rng, depth - 1)
+        right = random_expression(rng, depth - 1)
+        return f"{left} {op} {right}"
+    if kind < 0.65:
+        return f"({random_expression(rng, depth - 1)})"
+    if kind < 0.8:
+        return f"{rng.choice('-+')}{random_expression(rng, depth - 1)}"
+    args = ", ".join(
+        random_expression(rng, depth - 1) for _ in range(rng.randint(0, 3))
+    )
+    return f"{rng.choice(FUNCTIONS)}({args})"
+
+
+def random_lines(seed: int, count: int) -> list:
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        expression = random_expression(rng, 4)
+        if rng.random() < 0.7:
+            expression = f"{rng.choice(NAMES[:4])} = {expression}"
+        lines.append(expression)
+    return lines
+
+
+@pytest.mark.parametrize("line", SUPPORTED_LINES)
+def test_ast_backend_matches_pyparsing(line):
+    parse_tree = ast_parser.parse_line(line)
+    assert tuple_to_deque(parse_tree) == tuple_to_deque(
+        parse_expr_line(line, "pyparsing")
+    )
+
+
+@pytest.mark.parametrize("line", UNSUPPORTED_LINES)
+def test_unsupported_lines_fall_back_to_pyparsing(line):
+    with pytest.raises(ast_parser.UnsupportedExpression):
+        ast_parser.parse_line(line)
+    assert tuple_to_deque(parse_expr_line(line, "ast")) == tuple_to_deque(
+        parse_expr_line(line, "pyparsing")
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_corpus(seed):
+    parsed_by_ast = 0
+    for line in random_lines(seed, 200):
+        try:
+            expected = tuple_to_deque(parse_expr_line(line, "pyparsing"))
+        except Exception:
+            continue  # Not a line that handcalcs would parse
+        try:
+            parse_tree = ast_parser.parse_line(line)
+        except ast_parser.UnsupportedExpression:
+            continue
+        parsed_by_ast += 1
+        assert tuple_to_deque(parse_tree) == expected, line
+    assert parsed_by_ast > 100
@@ -0,0 +1,71 @@
+import threading
+
+from handcalcs import global_config
+from report.batch import PrerenderedValue, prepare_namespace, render_many
+
+
+class Load:
+    """
+    A value with units that cannot be pickled (it holds a lock), formatted
+    like a physical quantity.
+    """
+
+    def __init__(self, magnitude: float):
+        self.magnitude = magnitude
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{self.magnitude} kN"
+
+    def __mul__(self, other: float) -> "Load":
+        return Load(self.magnitude * other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other: float) -> "Load":
+        return Load(self.magnitude / other)
+
+    def __round__(self, ndigits: int = None) -> "Load":
+        return Load(round(self.magnitude, ndigits))
+
+    def __format__(self, format_spec: str) -> str:
+        return f"{format(self.magnitude, format_spec)}\\ \\mathrm{{kN}}"
+
+
+def run_cell(source: str, namespace: dict) -> dict:
+    results = dict(namespace)
+    exec(source, results)
+    results.pop("__builtins__", None)
+    return results
+
+
+CELLS = [
+    "## Loads\n\nP = P_k * gamma\n",
+    "## Geometry\n\nA = b * h # area\nI = b * h**3 / 12\n",
+    "## Stress\n\nsigma = N / A\n",
+]
+NAMESPACES = [
+    {"P_k": Load(1.5), "gamma": 1.35},
+    {"b": 0.3, "h": 0.5},
+    {"N": Load(150.0), "A": 0.15},
+]
+
+
+def test_prepare_namespace_prerenders_unpicklable_values():
+    config_options = dict(global_config._config)
+    namespace = prepare_namespace(
+        "P = P_k * gamma", NAMESPACES[0], None, None, **config_options
+    )
+    assert isinstance(namespace["P_k"], PrerenderedValue)
+    assert namespace["P_k"].latex == "1.500\\ \\mathrm{kN}"
+    assert namespace["gamma"] == 1.35
+
+
+def test_render_many_pooled_matches_serial():
+    snapshots = [
+        run_cell(cell, namespace) for cell, namespace in zip(CELLS, NAMESPACES)
+    ]
+    serial = render_many(CELLS, snapshots, workers=1)
+    pooled = render_many(CELLS, snapshots, workers=2)
+    assert pooled == serial
+    assert "\\textrm{1.500" not in "".join(pooled)
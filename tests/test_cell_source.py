@@ -0,0 +1,54 @@
+import inspect
+
+import pytest
+
+from handcalcs import decorator
+from handcalcs.decorator import _func_source_to_cell, get_cell_source
+
+
+def area(b, d):
+    """Rectangle area"""
+    A = b * d
+    return locals()
+
+
+def inertia(b, d):
+    I = b * d**3 / 12
+    return locals()
+
+
+@pytest.fixture
+def getsource_calls(monkeypatch):
+    calls = []
+    getsource = inspect.getsource
+
+    def counting_getsource(obj):
+        calls.append(obj)
+        return getsource(obj)
+
+    monkeypatch.setattr(decorator.inspect, "getsource", counting_getsource)
+    return calls
+
+
+def test_cell_source_matches_a_fresh_extraction(getsource_calls):
+    expected = _func_source_to_cell(inspect.getsource(area))
+    getsource_calls.clear()
+    assert get_cell_source(area) == expected
+    assert get_cell_source(area) == expected
+    assert "A = b * d" in expected
+    assert len(getsource_calls) == 1
+
+
+def test_cell_source_is_refreshed_when_the_code_is_replaced(getsource_calls):
+    def func(b, d):
+        A = b * d
+        return locals()
+
+    assert "A = b * d" in get_cell_source(func)
+    func.__code__ = inertia.__code__
+    refreshed = get_cell_source(func)
+    assert len(getsource_calls) == 2
+    assert refreshed == _func_source_to_cell(inspect.getsource(inertia))
+    assert "I = b * d**3 / 12" in refreshed
+    assert get_cell_source(func) == refreshed
+    assert len(getsource_calls) == 3
@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+import random
+import sys
+import threading
+
+import pytest
+
+from handcalcs import global_config
+from handcalcs.handcalcs import _conditional_evaluator, conditional_chain, latex
+
+CELL = """\
+if a < b: c = a * b
+elif a > b: c = a - b
+else: c = a + b
+if c > 10: d = c / 2
+else: d = c * 2
+e = c + d
+"""
+
+
+def run_cell(a: float, b: float) -> dict:
+    results = {"a": a, "b": b}
+    exec(CELL, results)
+    results.pop("__builtins__", None)
+    return results
+
+
+def render(results: dict) -> str:
+    return latex(CELL, results, "", global_config._config, None, None)
+
+
+CASES = [run_cell(a, b) for a, b in [(1, 2), (5, 2), (3, 3), (2, 9), (30, 1)]]
+
+
+@pytest.fixture
+def short_switch_interval():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Switch threads as often as possible
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_renders_from_many_threads_match_serial_renders(short_switch_interval):
+    expected = [render(results) for results in CASES]
+    assert len(set(expected)) == len(CASES)  # Each case takes other branches
+    order = [idx for idx in range(len(CASES)) for _ in range(100)]
+    random.Random(0).shuffle(order)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        rendered = list(executor.map(lambda idx: render(CASES[idx]), order))
+    for idx, latex_code in zip(order, rendered):
+        assert latex_code == expected[idx]
+
+
+def test_chain_state_does_not_leak_between_threads():
+    inside = threading.Event()
+    release = threading.Event()
+    seen = {}
+
+    def hold_chain():
+        with conditional_chain():
+            seen["holder"] = _conditional_evaluator.get(None)
+            inside.set()
+            release.wait(5)
+        seen["holder_after"] = _conditional_evaluator.get(None)
+
+    def look():
+        seen["other"] = _conditional_evaluator.get(None)
+
+    holder = threading.Thread(target=hold_chain)
+    holder.start()
+    inside.wait(5)
+    other = threading.Thread(target=look)
+    other.start()
+    other.join()
+    release.set()
+    holder.join()
+    assert seen["holder"] is not None
+    assert seen["other"] is None
+    assert seen["holder_after"] is None
@@ -0,0 +1,79 @@
+import pytest
+
+from report.dependencies import DependencyGraph, get_cell_names
+
+
+def test_augmented_assignment_reads_and_assigns_its_target():
+    assigned, referenced = get_cell_names("x += 1\ny = x * 2\n")
+    assert assigned == {"x", "y"}
+    assert referenced == {"x"}
+
+
+def test_names_read_after_assignment_are_not_referenced():
+    assigned, referenced = get_cell_names("x = a + 1\nx += b\n")
+    assert assigned == {"x"}
+    assert referenced == {"a", "b"}
+
+
+def test_names_local_to_functions_and_comprehensions_are_not_assigned():
+    assigned, referenced = get_cell_names(
+        "def f(a, b=c):\n    x = a * z\n    return x\n"
+        "y = sum(i for i in range(n))\n"
+        "g = lambda q: q + w\n"
+    )
+    assert assigned == {"f", "y", "g"}
+    assert referenced == {"c", "z", "sum", "range", "n", "w"}
+
+
+def test_global_statements_and_walrus_in_comprehensions_assign():
+    assigned, _ = get_cell_names(
+        "def f():\n    global G\n    G = 2\nlast = [v := i for i in r]\n"
+    )
+    assert assigned == {"f", "G", "last", "v"}
+
+
+def test_shadowed_reassignment():
+    graph = DependencyGraph.from_cells(
+        [(1, "a = 1"), (2, "b = a"), (3, "a = 5"), (4, "c = a")]
+    )
+    assert graph.downstream([1]) == [1, 2]
+    assert graph.downstream([2]) == [2]
+    assert graph.dependencies(4) == [3]
+
+
+def test_downstream_of_a_changed_cell_follows_the_dataflow():
+    graph = DependencyGraph.from_cells(
+        [(1, "a = 1"), (2, "b = a * 2"), (3, "c = b + 1"), (4, "d = 4")]
+    )
+    assert graph.downstream([1]) == [1, 2, 3]
+    assert graph.dependencies(3) == [2]
+
+
+def test_downstream_of_changed_names():
+    graph = DependencyGraph.from_cells(
+        [(1, "b = L * 2"), (2, "L = 3"), (3, "c = L + b")]
+    )
+    assert graph.downstream(changed_names=["L"]) == [1, 3]
+    assert graph.downstream(changed_names=["unused"]) == []
+
+
+def test_unknown_cells_raise_key_error():
+    graph = DependencyGraph.from_cells([(1, "a = 1")])
+    with pytest.raises(KeyError):
+        graph.downstream([2])
+
+
+@pytest.mark.parametrize(
+    "local_source",
+    [
+        "def f():\n    x = 1\n    return 0",
+        "y = sum(1 for x in range(3))",
+        "g = lambda x: x + 1",
+    ],
+)
+def test_local_names_do_not_shadow_upstream_assignments(local_source):
+    graph = DependencyGraph.from_cells(
+        [("A", "x = 3"), ("B", local_source), ("C", "w = x * 2")]
+    )
+    assert graph.downstream(["A"]) == ["A", "C"]
+    assert graph.dependencies("C") == ["A"]
@@ -0,0 +1,42 @@
+import math
+
+from handcalcs import disk_cache, set_option
+from handcalcs.fingerprint import fingerprint_names
+
+
+def get_render_key(cell: str, namespace: dict) -> tuple:
+    return ("", cell, fingerprint_names(["math", "a", "b"], namespace), "options")
+
+
+def test_keys_of_cells_referencing_modules_are_encoded():
+    key = get_render_key("c = math.sqrt(a) * b", {"math": math, "a": 2.0, "b": 3})
+    assert disk_cache.get_disk_key(key) is not None
+    assert disk_cache.encode_key(math) == "module:math"
+
+
+def test_equal_keys_give_the_same_disk_key():
+    key = get_render_key("c = math.sqrt(a) * b", {"math": math, "a": 2.0, "b": 3})
+    same_key = get_render_key(
+        "c = math.sqrt(a) * b", {"math": math, "a": float("2.0"), "b": 3}
+    )
+    other_key = get_render_key("c = math.sqrt(a) * b", {"math": math, "a": 2.5, "b": 3})
+    assert disk_cache.get_disk_key(key) == disk_cache.get_disk_key(same_key)
+    assert disk_cache.get_disk_key(key) != disk_cache.get_disk_key(other_key)
+
+
+def test_unstable_reprs_are_not_cached():
+    class Opaque:
+        def __hash__(self):
+            return 1
+
+    assert disk_cache.get_disk_key(("", "c = d", ((("d", Opaque()),)))) is None
+
+
+def test_store_and_load_with_a_module_in_the_key(tmp_path):
+    key = get_render_key("c = math.sqrt(a) * b", {"math": math, "a": 2.0, "b": 3})
+    set_option("disk_cache_dir", str(tmp_path))
+    try:
+        disk_cache.store(key, "rendered")
+        assert disk_cache.load(key) == "rendered"
+    finally:
+        set_option("disk_cache_dir", "")
@@ -0,0 +1,39 @@
+import pytest
+
+from handcalcs import cache_info, set_option
+from handcalcs.handcalcs import format_latex_repr, latex_repr
+
+VALUES = [0, 7, -12, 1.5, 2.0 / 3.0, -0.0, 0.0, 1e-12, 6.02e23, 1 + 2j, True, "1e-5"]
+
+
+@pytest.mark.parametrize("value", VALUES, ids=repr)
+@pytest.mark.parametrize("use_scientific_notation", [False, True])
+@pytest.mark.parametrize("precision", [0, 2, 5])
+def test_cached_formatting_matches_uncached(value, use_scientific_notation, precision):
+    expected = format_latex_repr(value, use_scientific_notation, precision, "")
+    assert latex_repr(value, use_scientific_notation, precision, "") == expected
+    assert latex_repr(value, use_scientific_notation, precision, "") == expected
+
+
+def test_cache_is_keyed_on_precision_and_notation():
+    assert latex_repr(2.0 / 3.0, False, 2, "") == "0.67"
+    assert latex_repr(2.0 / 3.0, False, 4, "") == "0.6667"
+    assert latex_repr(2.0 / 3.0, True, 2, "") == format_latex_repr(
+        2.0 / 3.0, True, 2, ""
+    )
+    assert cache_info()["format"]["misses"] == 3
+    latex_repr(2.0 / 3.0, False, 2, "")
+    assert cache_info()["format"]["hits"] == 1
+
+
+def test_equal_values_of_different_types_are_kept_apart():
+    assert latex_repr(2, False, 2, "") == "2.00"
+    assert latex_repr("2", False, 2, "") == "2"
+    assert latex_repr(-0.0, False, 1, "") == "-0.0"
+    assert latex_repr(0.0, False, 1, "") == "0.0"
+
+
+def test_disabled_cache_still_formats():
+    set_option("format_cache_size", 0)
+    assert latex_repr(1.5, False, 2, "") == "1.50"
+    assert cache_info()["format"]["size"] == 0
@@ -0,0 +1,86 @@
+import pytest
+
+from handcalcs.decorator import handcalc
+from handcalcs.history import CallHistory, HistoryPolicy
+
+
+@handcalc(record=True, history=HistoryPolicy(max_entries=2))
+def area(b, d):
+    A = b * d
+    return A
+
+
+def fill(policy, sizes):
+    history = CallHistory(policy)
+    kept = [history.append(idx, size=size) for idx, size in enumerate(sizes)]
+    return history, kept
+
+
+def test_max_entries_keeps_the_last_entries():
+    history, kept = fill(HistoryPolicy(max_entries=3), [10] * 5)
+    assert list(history) == [2, 3, 4]
+    assert kept == [True] * 5
+    assert (history.calls, history.dropped, history.nbytes) == (5, 2, 30)
+
+
+def test_max_entries_keeps_the_first_entries():
+    history, kept = fill(HistoryPolicy(max_entries=3, keep="first"), [10] * 5)
+    assert list(history) == [0, 1, 2]
+    assert kept == [True, True, True, False, False]
+    assert (history.calls, history.dropped, history.nbytes) == (5, 2, 30)
+
+
+def test_max_bytes_evicts_the_oldest_entries():
+    history, _ = fill(HistoryPolicy(max_bytes=100), [40, 40, 40, 90])
+    assert list(history) == [3]
+    assert (history.dropped, history.nbytes) == (3, 90)
+
+
+def test_max_bytes_keeps_the_first_entries():
+    history, kept = fill(HistoryPolicy(max_bytes=100, keep="first"), [40, 70, 60])
+    assert list(history) == [0, 2]
+    assert kept == [True, False, True]
+    assert (history.dropped, history.nbytes) == (1, 100)
+
+
+def test_entries_larger_than_max_bytes_are_not_kept():
+    history, kept = fill(HistoryPolicy(max_bytes=50), [20, 80])
+    assert len(history) == 0
+    assert kept == [True, False]
+    assert (history.dropped, history.nbytes) == (2, 0)
+
+
+def test_sample_every_records_every_kth_call():
+    history, _ = fill(HistoryPolicy(sample_every=3), [1] * 7)
+    assert list(history) == [0, 3, 6]
+    assert history.dropped == 4
+
+
+def test_clear_resets_the_counters():
+    history, _ = fill(HistoryPolicy(max_entries=1), [10, 10])
+    history.clear()
+    assert len(history) == 0
+    assert (history.calls, history.dropped, history.nbytes) == (0, 0, 0)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"keep": "middle"},
+        {"sample_every": 0},
+        {"max_entries": -1},
+        {"max_bytes": -1},
+    ],
+)
+def test_invalid_policies_raise_value_error(kwargs):
+    with pytest.raises(ValueError):
+        HistoryPolicy(**kwargs)
+
+
+def test_recorder_history_is_bounded_by_its_policy():
+    area.history.clear()
+    for b in range(1, 5):
+        area(b, 2)
+    assert [call["return"] for call in area.history] == [6, 8]
+    assert area.history.calls == 4
+    assert area.history.dropped == 2
@@ -0,0 +1,105 @@
+import math
+
+import numpy as np
+import pytest
+
+import handcalcs
+from handcalcs import handcalc, set_option
+from handcalcs.sweeps import sweep
+
+calls = []
+
+
+@handcalc(precision=2)
+def beam(w, L, E=200e3):
+    M = w * L**2 / 8
+    delta = 5 * w * L**4 / (384 * E)
+    return M
+
+
+@handcalc()
+def shifted(w):
+    s = w - np.min(w)
+    return s
+
+
+@handcalc()
+def column(P, A):
+    calls.append(P)
+    sigma = P / A
+    r = math.sqrt(A)
+    return sigma
+
+
+def test_vectorized_path_matches_calls_per_case():
+    result = sweep(beam, w=[1.5, 2.0, 2.5], L=np.array([[4.0], [6.0]]))
+    assert result.vectorized
+    assert len(result) == 6
+    for w, L, M in zip(result.inputs["w"], result.inputs["L"], result.results["M"]):
+        assert M == beam.__wrapped__(w, L)
+    assert result.return_values == result.results["M"]
+    assert "\\begin{array}{cc|cc}" in result.latex
+    assert "w & L & M & \\delta" in result.latex
+
+
+def test_elementwise_check_falls_back_for_reductions():
+    result = sweep(shifted, w=[1, 2, 3])
+    assert not result.vectorized
+    assert result.results["s"] == [0, 0, 0]
+
+
+def test_fallback_reuses_the_checked_cases():
+    calls.clear()
+    result = sweep(column, P=np.arange(50.0, 100.0, 5.0), A=5.0)
+    assert not result.vectorized  # math.sqrt() of an array fails
+    assert result.results["sigma"] == [P / 5.0 for P in result.inputs["P"]]
+    # The three checked cases, the failed vectorized run and the others once
+    assert len(calls) == 3 + 1 + (len(result) - 3)
+
+
+def test_scalars_are_broadcast_to_every_case():
+    result = sweep(beam, w=np.linspace(1.0, 2.0, 4), L=6.0)
+    assert result.inputs["L"] == [6.0] * 4
+    assert "\\begin{array}{c|cc}" in result.latex  # L does not vary
+    assert "w & M & \\delta" in result.latex
+
+
+@pytest.fixture
+def short_tables():
+    set_option("sweep_max_rows", 4)
+    yield
+    set_option("sweep_max_rows", 20)
+
+
+def table_rows(latex: str) -> list:
+    table = latex.split("\\hline\n", 1)[1].split("\\end{array}", 1)[0]
+    return table.strip().split("\n")
+
+
+def test_long_tables_are_truncated(short_tables):
+    result = sweep(beam, w=np.linspace(1.0, 2.0, 10), L=6.0)
+    rows = table_rows(result.latex)
+    assert len(rows) == 7
+    assert rows[3].startswith("\\vdots")
+    assert rows[0].startswith("1.00 &") and rows[-1].startswith("2.00 &")
+
+
+def test_tables_are_not_truncated_within_the_edge_items(short_tables):
+    result = sweep(beam, w=np.linspace(1.0, 2.0, 5), L=6.0)
+    rows = table_rows(result.latex)
+    assert len(rows) == 5
+    assert not any("\\vdots" in row for row in rows)
+
+
+def test_empty_inputs_raise_value_error():
+    with pytest.raises(ValueError):
+        sweep(beam, w=np.array([]), L=4.0)
+    with pytest.raises(ValueError):
+        sweep(beam)
+
+
+def test_module_is_not_shadowed_by_the_function():
+    import handcalcs.sweeps as module
+
+    assert handcalcs.sweep is module.sweep
+    assert callable(module.render_sweep_table)
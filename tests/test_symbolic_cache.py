@@ -0,0 +1,42 @@
+from handcalcs import cache_info, clear_caches, global_config, set_option
+from handcalcs.handcalcs import latex
+
+CELL = """\
+x_1 = alpha * sqrt(beta_2**2 + 1) / (2 * gamma)
+y = x_1 + alpha / beta_2
+"""
+
+
+def render(values: dict) -> str:
+    results = dict(values)
+    exec(CELL, {"sqrt": abs}, results)
+    results["sqrt"] = abs
+    return latex(CELL, results, "", global_config._config, None, None)
+
+
+def test_cached_symbolic_latex_matches_a_fresh_render():
+    fresh = render({"alpha": 1.5, "beta_2": 2.0, "gamma": 3.0})
+    misses = cache_info()["symbolic"]["misses"]
+    cached = render({"alpha": 1.5, "beta_2": 2.0, "gamma": 3.0})
+    assert cached == fresh
+    assert cache_info()["symbolic"]["hits"] >= 2
+    assert cache_info()["symbolic"]["misses"] == misses
+
+
+def test_new_values_reuse_the_symbolic_half_only():
+    render({"alpha": 1.5, "beta_2": 2.0, "gamma": 3.0})
+    cached = render({"alpha": 2.5, "beta_2": 4.0, "gamma": 5.0})
+    clear_caches()
+    fresh = render({"alpha": 2.5, "beta_2": 4.0, "gamma": 5.0})
+    assert cached == fresh
+    assert "2.500" in cached
+
+
+def test_options_invalidate_the_symbolic_latex():
+    values = {"alpha": 1.5, "beta_2": 2.0, "gamma": 3.0}
+    assert "\\alpha" in render(values)
+    set_option("greek_exclusions", ["alpha"])
+    excluded = render(values)
+    assert "\\alpha" not in excluded
+    clear_caches()
+    assert render(values) == excluded
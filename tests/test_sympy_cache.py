@@ -0,0 +1,56 @@
+import pytest
+
+from handcalcs import cache_info, set_option
+from handcalcs.handcalcs import latex_repr_sympy, render_sympy, round_sympy
+
+sympy = pytest.importorskip("sympy")
+
+x, y = sympy.symbols("x y")
+
+EXPRESSIONS = [
+    x**2 + sympy.Float("1.23456") * y,
+    sympy.Rational(1, 3) * x + sympy.sqrt(2),
+    sympy.Float("0.000123456") * sympy.sin(x),
+    sympy.Matrix([[x, sympy.Float("2.71828")], [0, y]]),
+]
+
+
+def render_uncached(expression, precision, use_scientific_notation):
+    return render_sympy(round_sympy(expression, precision, use_scientific_notation))
+
+
+@pytest.mark.parametrize("expression", EXPRESSIONS, ids=str)
+@pytest.mark.parametrize("use_scientific_notation", [False, True])
+@pytest.mark.parametrize("precision", [1, 3])
+def test_cached_latex_matches_uncached(expression, use_scientific_notation, precision):
+    expected = render_uncached(expression, precision, use_scientific_notation)
+    for _ in range(2):
+        rendered = latex_repr_sympy(expression, precision, use_scientific_notation)
+        assert rendered == expected
+
+
+def test_cache_is_keyed_on_precision():
+    expression = EXPRESSIONS[0]
+    assert "1.23" in latex_repr_sympy(expression, 2, False)
+    assert "1.2346" in latex_repr_sympy(expression, 4, False)
+    assert cache_info()["sympy"]["misses"] == 2
+    latex_repr_sympy(expression, 2, False)
+    assert cache_info()["sympy"]["hits"] == 1
+
+
+def test_mutable_matrices_are_not_cached():
+    matrix = sympy.Matrix([[x, sympy.Float("1.5")]])
+    before = latex_repr_sympy(matrix, 2, False)
+    matrix[0, 0] = y
+    after = latex_repr_sympy(matrix, 2, False)
+    assert before != after
+    assert after == render_uncached(matrix, 2, False)
+
+
+def test_exact_expressions_are_skipped_only_with_the_option():
+    exact = EXPRESSIONS[1]
+    assert round_sympy(exact, 2, False) is exact
+    set_option("sympy_skip_exact", False)
+    rounded = round_sympy(exact, 2, False)
+    assert rounded == exact
+    assert render_sympy(rounded) == render_sympy(exact)